@@ -0,0 +1,58 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a fixed list of patterns.
+
+    Built once; find_all walks the text one character at a time and reports every pattern
+    occurring in it, so the cost is linear in the length of the text (plus the number of
+    hits) however many patterns there are.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        # goto[state] maps a character to the next state, fail[state] is the longest proper
+        # suffix of the state that is also a prefix of some pattern, and output[state] holds
+        # the patterns that end in this state
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for index, pattern in enumerate(self.patterns):
+            self.add_pattern(pattern, index)
+        self.build_failure_links()
+
+    def add_pattern(self, pattern, index):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(index)
+
+    def build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find_all(self, text):
+        # (end position, pattern index) of every pattern occurring in text
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for index in self.output[state]:
+                yield position, index
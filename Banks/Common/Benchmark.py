@@ -0,0 +1,82 @@
+import argparse
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+import pandas as pd
+
+from Common.PageOCR import PageOCR
+from Common.RenderProfiles import RENDER_PROFILES
+from Common.StatementEngine import STATEMENT_ENGINE
+AMOUNT_COLUMNS = ["Account Balance", "Transaction Amount"]
+
+
+def row_keys(df):
+    # A parsed row counts as correct when its description and amount match the reference
+    amount_column = next(column for column in AMOUNT_COLUMNS if column in df.columns)
+    descriptions = df["Description"].astype(str).map(lambda text: re.sub(r'\s+', ' ', text).strip().upper())
+    amounts = pd.to_numeric(df[amount_column], errors="coerce").round(2)
+    return Counter(zip(descriptions, amounts))
+
+
+def parse_accuracy(result, expected):
+    # Share of reference rows reproduced exactly, plus the number of rows not in the reference
+    result_keys = row_keys(result)
+    expected_keys = row_keys(expected)
+    matched = sum((result_keys & expected_keys).values())
+    return matched / max(sum(expected_keys.values()), 1), sum((result_keys - expected_keys).values())
+
+
+def run_profile(bank, statement, pdf_path, regex_patterns, profile, workers):
+    temp_image_folder = tempfile.mkdtemp(prefix="benchmark_")
+    try:
+        page_ocr = PageOCR(workers=workers, stream=True, render_profile=profile)
+        processor = STATEMENT_ENGINE.processor(bank, statement, pdf_path=pdf_path, file_name=os.path.basename(pdf_path),
+                                               temp_image_folder=temp_image_folder, page_ocr=page_ocr)
+        start = time.perf_counter()
+        result = processor.process_bank_statement(use_ocr=True, regex_patterns=regex_patterns)
+        elapsed = time.perf_counter() - start
+        return result, processor.pages_read, elapsed
+    finally:
+        shutil.rmtree(temp_image_folder, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare OCR render profiles on one statement")
+    parser.add_argument("pdf", help="statement PDF to process")
+    parser.add_argument("--bank", default="UOB", choices=sorted({bank for bank, _ in STATEMENT_ENGINE.statements()}))
+    parser.add_argument("--statement", default="bank", choices=sorted({statement for _, statement in STATEMENT_ENGINE.statements()}))
+    parser.add_argument("--expected", help="reviewed CSV export of the same statement, used for parse accuracy")
+    parser.add_argument("--profiles", nargs="+", default=sorted(RENDER_PROFILES), choices=sorted(RENDER_PROFILES))
+    parser.add_argument("--workers", type=int, default=1)
+    # The section markers default to the ones in the statement's spec
+    parser.add_argument("--start-marker")
+    parser.add_argument("--end-marker")
+    args = parser.parse_args()
+
+    if not STATEMENT_ENGINE.supports(args.bank, args.statement):
+        parser.error(f"no statement spec for {args.bank} {args.statement}")
+    spec, _ = STATEMENT_ENGINE.lookup(args.bank, args.statement)
+    regex_patterns = {"start_marker": args.start_marker or spec.start_marker,
+                      "end_marker": args.end_marker or spec.end_marker}
+    expected = pd.read_csv(args.expected) if args.expected else None
+
+    print(f"{'profile':<10} {'pages':>5} {'seconds':>8} {'pages/sec':>9} {'rows':>5} {'accuracy':>8} {'extra':>5}")
+    for profile in args.profiles:
+        try:
+            result, pages, elapsed = run_profile(args.bank, args.statement, args.pdf, regex_patterns, profile, args.workers)
+        except Exception as e:
+            print(f"{profile:<10} failed: {e}")
+            continue
+        accuracy, extra = parse_accuracy(result, expected) if expected is not None else (float("nan"), 0)
+        print(f"{profile:<10} {pages:>5} {elapsed:>8.2f} {pages / elapsed:>9.2f} {len(result):>5} "
+              f"{accuracy:>8.1%} {extra:>5}")
+
+
+# Run from the Banks directory, e.g.
+# python -m Common.Benchmark UOB/PDF/Aug_Accounts.pdf --bank UOB --expected UOB/CSV/Aug_Accounts/Aug_Accounts.csv
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from Common.AhoCorasick import AhoCorasick
+
+# Categorisation rules, reloaded when the file changes (override with CATEGORY_RULES_PATH)
+CATEGORY_RULES_PATH = os.getenv("CATEGORY_RULES_PATH",
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), "category_rules.json"))
+# How often (in seconds) the rule file is checked for changes
+CATEGORY_RULES_RELOAD_SECONDS = float(os.getenv("CATEGORY_RULES_RELOAD_SECONDS", 2))
+
+MATCH_TYPES = ("contains", "prefix", "equals", "regex")
+# What a rule can match on and what it can set
+RULE_FIELDS = ("Description", "Merchant", "Payment Method", "Category")
+RULE_OUTPUTS = ("Transaction Type", "Merchant", "Payment Method", "Location", "Category")
+UNKNOWN = 'Unknown'
+
+
+@dataclass(frozen=True)
+class CategoryRule:
+    name: str
+    priority: int
+    field: str
+    match: str
+    value: str
+    outputs: tuple
+    ignore_case: bool = False
+
+
+class FieldIndex:
+    """
+    Every rule on one field, indexed so that finding the rules a value matches does not
+    look at each rule in turn: contains/prefix rules share one Aho-Corasick automaton (one
+    more for the case-insensitive ones), equals rules are a dict lookup and only regex rules
+    are tried one by one.
+    """
+
+    def __init__(self, rules):
+        substring_rules = [(rank, rule) for rank, rule in rules if rule.match in ("contains", "prefix")]
+        self.substring_rules = [[(rank, rule) for rank, rule in substring_rules if not rule.ignore_case],
+                                [(rank, rule) for rank, rule in substring_rules if rule.ignore_case]]
+        self.automata = [AhoCorasick(rule.value for _, rule in self.substring_rules[0]),
+                         AhoCorasick(rule.value.upper() for _, rule in self.substring_rules[1])]
+        self.equals = [defaultdict(list), defaultdict(list)]
+        self.regexes = []
+        for rank, rule in rules:
+            if rule.match == "equals":
+                key = rule.value.upper() if rule.ignore_case else rule.value
+                self.equals[rule.ignore_case][key].append(rank)
+            elif rule.match == "regex":
+                self.regexes.append((rank, re.compile(rule.value, re.IGNORECASE if rule.ignore_case else 0)))
+
+    def matching_ranks(self, value):
+        ranks = set()
+        for ignore_case, text in enumerate((value, value.upper())):
+            rules = self.substring_rules[ignore_case]
+            for end, index in self.automata[ignore_case].find_all(text):
+                rank, rule = rules[index]
+                if rule.match == "contains" or end == len(rule.value) - 1:
+                    ranks.add(rank)
+            ranks.update(self.equals[ignore_case].get(text, ()))
+        ranks.update(rank for rank, pattern in self.regexes if pattern.search(value))
+        return ranks
+
+
+class CompiledRuleSet:
+    """
+    An immutable, compiled version of the rule file.
+
+    apply() fills every output from the highest priority matching rule that sets it, then
+    from the values already known (e.g. from the merchant dictionary), then from the
+    defaults of the rule file.
+    """
+
+    def __init__(self, rules, defaults, version):
+        # Highest priority first; equal priorities keep their order in the file
+        self.rules = sorted(rules, key=lambda rule: -rule.priority)
+        self.defaults = defaults
+        self.version = version
+        rules_by_field = defaultdict(list)
+        for rank, rule in enumerate(self.rules):
+            rules_by_field[rule.field].append((rank, rule))
+        self.indexes = {field: FieldIndex(field_rules) for field, field_rules in rules_by_field.items()}
+
+    def apply(self, values):
+        # values: {field: value} of one transaction; returns the RULE_OUTPUTS
+        ranks = set()
+        for field, index in self.indexes.items():
+            value = values.get(field)
+            if value:
+                ranks.update(index.matching_ranks(value))
+
+        outputs = {}
+        for rank in sorted(ranks):
+            for column, output in self.rules[rank].outputs:
+                outputs.setdefault(column, output)
+        for column in RULE_OUTPUTS:
+            if column not in outputs:
+                known = values.get(column, UNKNOWN)
+                outputs[column] = known if known != UNKNOWN else self.defaults.get(column, UNKNOWN)
+        return outputs
+
+    def __len__(self):
+        return len(self.rules)
+
+
+def load_rule_set(path=CATEGORY_RULES_PATH):
+    with open(path, 'rb') as file:
+        content = file.read()
+    registry = json.loads(content)
+
+    rules = []
+    for position, entry in enumerate(registry.get("rules", [])):
+        name = entry.get("name", f"rule {position + 1}")
+        if entry.get("field") not in RULE_FIELDS:
+            raise ValueError(f"Rule '{name}' matches unknown field '{entry.get('field')}'")
+        if entry.get("match") not in MATCH_TYPES:
+            raise ValueError(f"Rule '{name}' has unknown match type '{entry.get('match')}'")
+        if not entry.get("value"):
+            raise ValueError(f"Rule '{name}' has no value to match")
+        outputs = entry.get("output", {})
+        unknown_outputs = set(outputs) - set(RULE_OUTPUTS)
+        if not outputs or unknown_outputs:
+            raise ValueError(f"Rule '{name}' must set some of {list(RULE_OUTPUTS)}")
+        if entry["match"] == "regex":
+            re.compile(entry["value"])
+        rules.append(CategoryRule(name=name, priority=int(entry.get("priority", 0)), field=entry["field"],
+                                  match=entry["match"], value=entry["value"], outputs=tuple(outputs.items()),
+                                  ignore_case=bool(entry.get("ignore_case", False))))
+    return CompiledRuleSet(rules, registry.get("defaults", {}), hashlib.sha256(content).hexdigest()[:16])
+
+
+class CategoryRuleEngine:
+    """
+    Holds the compiled rule set and swaps in a new one when the rule file changes.
+
+    The file is checked at most every reload_seconds. The new rules are compiled next to the
+    current ones and published with a single assignment, so a classification that already
+    holds the old rule set finishes with it and nothing waits for the reload. A rule file
+    that fails to load is reported and the current rules stay in place.
+    """
+
+    def __init__(self, path=CATEGORY_RULES_PATH, reload_seconds=CATEGORY_RULES_RELOAD_SECONDS):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self.loaded_mtime = self.file_mtime()
+        self.rule_set = load_rule_set(path)
+        self.next_check = time.monotonic() + reload_seconds
+        self._reload_lock = threading.Lock()
+
+    def file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def current(self):
+        # The rule set to use for one classification run
+        now = time.monotonic()
+        if now >= self.next_check and self._reload_lock.acquire(blocking=False):
+            # Only one caller reloads; everyone else carries on with the current rules
+            try:
+                self.next_check = now + self.reload_seconds
+                mtime = self.file_mtime()
+                if mtime is not None and mtime != self.loaded_mtime:
+                    self.loaded_mtime = mtime
+                    self.reload()
+            finally:
+                self._reload_lock.release()
+        return self.rule_set
+
+    def reload(self):
+        try:
+            rule_set = load_rule_set(self.path)
+        except (OSError, ValueError, re.error) as e:
+            print(f"Warning: keeping the current category rules, could not load {self.path}: {e}")
+            return False
+        self.rule_set = rule_set
+        print(f"Loaded {len(rule_set)} category rules from {self.path}")
+        return True
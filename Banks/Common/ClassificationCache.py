@@ -0,0 +1,137 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Bump when the table layout or the meaning of a key changes; older caches are dropped
+SCHEMA_VERSION = 1
+
+# Parts of a description that change between otherwise identical transactions, replaced by
+# a placeholder in the cache key (in this order: references before dates, since "1234 1234567"
+# also looks like a date)
+DESCRIPTION_MASKS = [
+    (re.compile(r'\d{4} \d{7}'), '<REF>'),
+    (re.compile(r'\d+\.\d{2}'), '<AMT>'),
+    (re.compile(r'\b\d{1,2}\s?(?:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)[A-Z]*\b', re.IGNORECASE), '<DATE>'),
+    (re.compile(r'\d{1,2}/\d{1,2}(?:/\d{2,4})?'), '<DATE>'),
+    (re.compile(r'\d{3,}'), '<NUM>'),
+]
+
+
+def normalise_descriptions(descriptions):
+    # Cache key of every description in a Series: whitespace collapsed, references, amounts,
+    # dates and long numbers masked
+    keys = descriptions.str.replace(r'\s+', ' ', regex=True).str.strip()
+    for pattern, placeholder in DESCRIPTION_MASKS:
+        keys = keys.str.replace(pattern, placeholder, regex=True)
+    return keys
+
+
+class ClassificationCache:
+    """
+    Bounded LRU cache of classification results keyed by normalised description.
+
+    Statements repeat the same descriptions every month, so once a description has been
+    classified its result is reused instead of running the classifier again. Results are
+    stored per rules version: changing the rules (e.g. the merchant dictionary) makes the
+    old results unreachable rather than wrong. With a db_path the cache is kept in SQLite
+    and reloaded by the next analyser run.
+    """
+
+    def __init__(self, max_entries=100000, db_path=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if db_path:
+            if os.path.dirname(db_path):
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            with self.connect() as connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                    connection.execute("DROP TABLE IF EXISTS classifications")
+                    connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS classifications (
+                        rules_version TEXT NOT NULL,
+                        description_key TEXT NOT NULL,
+                        result TEXT NOT NULL,
+                        last_access REAL NOT NULL,
+                        PRIMARY KEY (rules_version, description_key)
+                    )
+                """)
+                rows = connection.execute(
+                    "SELECT rules_version, description_key, result FROM classifications "
+                    "ORDER BY last_access DESC LIMIT ?", (max_entries,)).fetchall()
+            # Oldest first, so the most recently used entries end up at the back of the LRU
+            for rules_version, description_key, result in reversed(rows):
+                self.entries[(rules_version, description_key)] = tuple(json.loads(result))
+
+    @contextmanager
+    def connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get_many(self, rules_version, description_keys):
+        # {key: result} for the keys already classified under rules_version
+        found = {}
+        with self._lock:
+            for description_key in description_keys:
+                result = self.entries.get((rules_version, description_key))
+                if result is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self.entries.move_to_end((rules_version, description_key))
+                    found[description_key] = result
+        if found and self.db_path:
+            now = time.time()
+            with self.connect() as connection:
+                connection.executemany(
+                    "UPDATE classifications SET last_access = ? WHERE rules_version = ? AND description_key = ?",
+                    [(now, rules_version, description_key) for description_key in found])
+        return found
+
+    def put_many(self, rules_version, results):
+        evicted = []
+        with self._lock:
+            for description_key, result in results.items():
+                self.entries[(rules_version, description_key)] = tuple(result)
+                self.entries.move_to_end((rules_version, description_key))
+            while len(self.entries) > self.max_entries:
+                evicted.append(self.entries.popitem(last=False)[0])
+            self.evictions += len(evicted)
+        if self.db_path:
+            now = time.time()
+            with self.connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO classifications (rules_version, description_key, result, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(rules_version, description_key, json.dumps(list(result)), now)
+                     for description_key, result in results.items()])
+                connection.executemany(
+                    "DELETE FROM classifications WHERE rules_version = ? AND description_key = ?", evicted)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+            }
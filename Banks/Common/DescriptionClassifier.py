@@ -0,0 +1,133 @@
+import hashlib
+import re
+
+import pandas as pd
+
+from Common.CategoryRules import CATEGORY_RULES_PATH, CategoryRuleEngine
+from Common.ClassificationCache import ClassificationCache, normalise_descriptions
+from Common.FuzzyMerchants import FuzzyMerchantMatcher, MerchantClusterer
+from Common.MerchantDictionary import MERCHANT_DICTIONARY_PATH, load_merchant_dictionary
+
+UNKNOWN = 'Unknown'
+CLASSIFIED_COLUMNS = ['Transaction Type', 'Date', 'Reference Number', 'Merchant', 'Payment Method', 'Location',
+                      'Category', 'Merchant Group']
+# Fields that only depend on the (normalised) description and can be cached; the date and
+# reference number differ from row to row and are always extracted, and the merchant group
+# depends on every description seen so far
+CACHED_COLUMNS = ['Transaction Type', 'Merchant', 'Payment Method', 'Location', 'Category']
+# Bump when the classification code changes meaning, so cached results are not reused
+CLASSIFIER_VERSION = 3
+
+
+
+class DescriptionClassifier:
+    """
+    Classifies transaction descriptions a whole column at a time.
+
+    Only distinct normalised descriptions are classified, and with a cache (see
+    Common.ClassificationCache) only those not classified before under the same merchant
+    dictionary and category rules. Merchants come from the merchant dictionary (see
+    Common.MerchantDictionary) and every other field from the category rules (see
+    Common.CategoryRules); the per-row date and reference number are extracted with one
+    Series.str.extract over the distinct descriptions. Results are assigned as whole columns.
+
+    Descriptions the dictionary does not match exactly are matched fuzzily (see
+    Common.FuzzyMerchants), so OCR slips like "SH0PEE" still find their merchant, and the
+    merchants that are still unknown are clustered into a 'Merchant Group' so that one
+    merchant's transactions can be grouped without a dictionary entry.
+    """
+
+    def __init__(self, merchant_dictionary, rule_engine, cache=None, fuzzy_matcher=None, clusterer=None):
+        self.date = re.compile(r'(\d{2} \w{3})')
+        self.reference = re.compile(r'(\d{4} \d{7})')
+        self.merchant_dictionary = merchant_dictionary
+        self.rule_engine = rule_engine
+        self.cache = cache
+        self.fuzzy_matcher = fuzzy_matcher
+        self.clusterer = clusterer
+        self.dictionary_version = hashlib.sha256(
+            repr((CLASSIFIER_VERSION, merchant_dictionary.entries)).encode('utf-8')).hexdigest()[:16]
+
+    def classify(self, descriptions):
+        # One row per description with the CLASSIFIED_COLUMNS, on the same index
+        # The rule set is taken once, so a rule reload halfway through does not mix rules
+        rule_set = self.rule_engine.current()
+        rules_version = f"{self.dictionary_version}:{rule_set.version}"
+        descriptions = descriptions.fillna('').astype(str).str.strip()
+        # Everything below runs once per distinct description and is spread back with take
+        description_codes, distinct = pd.factorize(descriptions)
+        distinct = pd.Series(distinct, dtype=object)
+
+        keys = normalise_descriptions(distinct)
+        key_codes, unique_keys = pd.factorize(keys)
+        # The first description of every key stands in for all of them
+        representatives = distinct[~keys.duplicated()]
+
+        known = self.cache.get_many(rules_version, unique_keys) if self.cache is not None else {}
+        missing = [position for position, key in enumerate(unique_keys) if key not in known]
+        if missing:
+            classified = self.classify_distinct(representatives.iloc[missing], rule_set)
+            new_results = {unique_keys[position]: row
+                           for position, row in zip(missing, classified.itertuples(index=False, name=None))}
+            if self.cache is not None:
+                self.cache.put_many(rules_version, new_results)
+            known = {**known, **new_results}
+        table = pd.DataFrame([known[key] for key in unique_keys], columns=CACHED_COLUMNS)
+        table_codes = key_codes[description_codes]
+
+        result = pd.DataFrame(index=descriptions.index)
+        result['Transaction Type'] = table['Transaction Type'].to_numpy()[table_codes]
+        result['Date'] = distinct.str.extract(self.date, expand=False).fillna(UNKNOWN).to_numpy()[description_codes]
+        result['Reference Number'] = (distinct.str.extract(self.reference, expand=False).fillna(UNKNOWN)
+                                      .to_numpy()[description_codes])
+        for column in CACHED_COLUMNS[1:]:
+            result[column] = table[column].to_numpy()[table_codes]
+        result['Merchant Group'] = self.merchant_groups(unique_keys, table['Merchant'])[table_codes]
+        return result
+
+    def merchant_groups(self, unique_keys, merchants):
+        # The merchant where it is known, otherwise the cluster of the normalised description
+        groups = merchants.to_numpy(dtype=object, copy=True)
+        for position, key in enumerate(unique_keys):
+            if groups[position] == UNKNOWN and self.clusterer is not None:
+                groups[position] = self.clusterer.assign(key) or UNKNOWN
+        return groups
+
+    def classify_distinct(self, descriptions, rule_set):
+        # The CACHED_COLUMNS of a Series of distinct descriptions: merchant dictionary first,
+        # then the fuzzy matcher, then the category rules (see Common.CategoryRules)
+        rows = []
+        for description in descriptions:
+            entry = self.merchant_dictionary.match(description)
+            if entry is None and self.fuzzy_matcher is not None:
+                entry, _ = self.fuzzy_matcher.match(description) or (None, None)
+            rows.append(rule_set.apply({
+                'Description': description,
+                'Merchant': entry.merchant if entry else UNKNOWN,
+                'Payment Method': entry.payment_method if entry and entry.payment_method else UNKNOWN,
+                'Category': entry.category if entry and entry.category else UNKNOWN,
+            }))
+        return pd.DataFrame(rows, columns=CACHED_COLUMNS, index=descriptions.index)
+
+    def classify_one(self, description):
+        return self.classify(pd.Series([description])).iloc[0].to_dict()
+
+
+# Compiled once at import and shared by every classifier
+MERCHANT_DICTIONARY = load_merchant_dictionary(MERCHANT_DICTIONARY_PATH)
+FUZZY_MERCHANT_MATCHER = FuzzyMerchantMatcher(MERCHANT_DICTIONARY)
+
+
+def build_description_classifier(cache_max_entries=100000, cache_path=None, clusters_path=None):
+    # A classifier over the merchant dictionary and category rules; with cache_path and
+    # clusters_path its cached results and merchant clusters are kept in SQLite across runs,
+    # otherwise in memory only
+    return DescriptionClassifier(MERCHANT_DICTIONARY, CategoryRuleEngine(CATEGORY_RULES_PATH),
+                                 cache=ClassificationCache(cache_max_entries, db_path=cache_path),
+                                 fuzzy_matcher=FUZZY_MERCHANT_MATCHER,
+                                 clusterer=MerchantClusterer(db_path=clusters_path))
+
+
+# Default of the analysers, kept in memory so importing this module writes nothing; the
+# service builds one stored on disk (see main.py)
+DESCRIPTION_CLASSIFIER = build_description_classifier()
@@ -0,0 +1,272 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+# Characters the OCR confuses with each other are folded to one of them before comparing,
+# so "SH0PEE" and "5HOPEE" both read as "SHOPEE"
+OCR_CONFUSIONS = str.maketrans({'0': 'O', '1': 'I', '|': 'I', '!': 'I', 'L': 'I', '5': 'S', '8': 'B', '$': 'S'})
+# Largest edit distance accepted, as a share of the merchant pattern's length
+MAX_DISTANCE_RATIO = 0.2
+# Shorter patterns ("GRAB", "SHELL") are only ever matched exactly
+MIN_FUZZY_PATTERN_LENGTH = 6
+# Share of a pattern's trigrams a description must contain to be compared with it at all
+MIN_TRIGRAM_OVERLAP = 0.5
+MAX_CANDIDATES = 5
+# Words that say how or where a transaction was paid rather than who was paid; neither the
+# fuzzy matcher nor the clusterer compares them
+CLUSTER_STOP_WORDS = {'DR', 'CR', 'DEBIT', 'CARD', 'SG', 'SGP', 'SINGAPORE', 'PTE', 'LTD', 'GPAY', 'NETS', 'POS',
+                      'PURCHASE', 'TRANSFER', 'PAYMENT', 'REF', 'AMT', 'DATE', 'NUM'}
+
+
+def fold(text):
+    return re.sub(r'\s+', ' ', text.upper().translate(OCR_CONFUSIONS)).strip()
+
+
+FOLDED_STOP_WORDS = {fold(word) for word in CLUSTER_STOP_WORDS}
+
+
+def folded_words(text):
+    return [word for word in re.split(r'[^A-Z0-9]+', fold(text)) if word]
+
+
+def merchant_tokens(text):
+    # Folded words of text without the stop words, e.g. ["EBAY"] for "DR-Debit Card EBAY SINGAPORE SG"
+    return [word for word in folded_words(text) if word not in FOLDED_STOP_WORDS]
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def edit_distance(a, b, max_distance):
+    # Levenshtein distance of a and b, or max_distance + 1 as soon as it is known to exceed it
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def substring_distance(pattern, text, max_distance):
+    # Smallest edit distance between pattern and any substring of text (Sellers' algorithm),
+    # or max_distance + 1 as soon as it is known to exceed it
+    previous = [0] * (len(text) + 1)
+    for i, char_p in enumerate(pattern, 1):
+        current = [i]
+        for j, char_t in enumerate(text, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_p != char_t)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous)
+
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to the strings containing them.
+
+    Candidates for a query are found by counting shared trigrams over the posting lists of
+    the query's own trigrams only, so a lookup never touches strings that share nothing
+    with the query.
+    """
+
+    def __init__(self, items=()):
+        self.items = []
+        self.item_trigrams = []
+        self.postings = defaultdict(list)
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        item_id = len(self.items)
+        self.items.append(item)
+        grams = trigrams(item)
+        self.item_trigrams.append(len(grams))
+        for gram in grams:
+            self.postings[gram].append(item_id)
+        return item_id
+
+    def candidates(self, text, min_overlap, limit):
+        # Ids of up to limit items with at least min_overlap of their trigrams in text, best first
+        shared = Counter()
+        for gram in trigrams(text):
+            shared.update(self.postings.get(gram, ()))
+        scored = [(count / self.item_trigrams[item_id], item_id) for item_id, count in shared.items()
+                  if self.item_trigrams[item_id] and count / self.item_trigrams[item_id] >= min_overlap]
+        scored.sort(reverse=True)
+        return [item_id for _, item_id in scored[:limit]]
+
+
+class FuzzyMerchantMatcher:
+    """
+    Finds known merchants in OCR-garbled descriptions.
+
+    Patterns of the merchant dictionary are folded (case and OCR look-alikes), stripped of
+    the payment and location words (CLUSTER_STOP_WORDS) and indexed by trigram. A
+    description, stripped the same way, is only compared with the few patterns that share
+    most of their trigrams with it, and matches one only if every word of the pattern is
+    found in it within that word's own edit distance budget; "EBAY SINGAPORE" is not
+    "GPAY SINGAPORE" just because the shared location word makes the whole strings close.
+    Stop words of a pattern must appear in the description as they are, so "SINGAPORE
+    AIRLINES" does not take every other airline, and patterns made of stop words only
+    ("GPAY SINGAPORE") are left to the exact matcher.
+    """
+
+    def __init__(self, merchant_dictionary, max_distance_ratio=MAX_DISTANCE_RATIO):
+        self.max_distance_ratio = max_distance_ratio
+        self.entries = []
+        self.pattern_tokens = []
+        self.pattern_stop_words = []
+        patterns = []
+        for entry in merchant_dictionary.entries:
+            tokens = merchant_tokens(entry.pattern)
+            if len(' '.join(tokens)) >= MIN_FUZZY_PATTERN_LENGTH:
+                self.entries.append(entry)
+                self.pattern_tokens.append(tokens)
+                self.pattern_stop_words.append(set(folded_words(entry.pattern)) & FOLDED_STOP_WORDS)
+                patterns.append(' '.join(tokens))
+        self.index = TrigramIndex(patterns)
+
+    def match(self, description):
+        # (entry, distance) of the closest merchant within the allowed distance, or None; the
+        # distance is the sum of the pattern words' distances
+        words = folded_words(description)
+        text = ' '.join(word for word in words if word not in FOLDED_STOP_WORDS)
+        best = None
+        for item_id in self.index.candidates(text, MIN_TRIGRAM_OVERLAP, MAX_CANDIDATES):
+            if not self.pattern_stop_words[item_id].issubset(words):
+                continue
+            distance = 0
+            for token in self.pattern_tokens[item_id]:
+                max_distance = int(len(token) * self.max_distance_ratio)
+                token_distance = substring_distance(token, text, max_distance)
+                if token_distance > max_distance:
+                    distance = None
+                    break
+                distance += token_distance
+            if distance is None:
+                continue
+            if best is None or (distance, -len(self.index.items[item_id])) < (best[1], -len(best[2])):
+                best = (self.entries[item_id], distance, self.index.items[item_id])
+        return best[:2] if best else None
+
+
+class MerchantClusterer:
+    """
+    Groups descriptions of merchants that are not in the dictionary.
+
+    Each description is reduced to its merchant-looking words and compared (by edit
+    distance, through a trigram index of the cluster labels) with the existing clusters
+    only; it joins the closest one within MAX_DISTANCE_RATIO or starts a new cluster. The
+    clusters are shared by every request thread, and with a db_path every assignment is
+    kept in SQLite: a restarted service (or another worker process) reloads them, so a
+    recurring merchant keeps the label already stored in transactions.merchant_group.
+    """
+
+    def __init__(self, max_distance_ratio=MAX_DISTANCE_RATIO, db_path=None):
+        self.max_distance_ratio = max_distance_ratio
+        self.db_path = db_path
+        # Folded text of every cluster's first member, and the label shown for it
+        self.index = TrigramIndex()
+        self.cluster_labels = []
+        self.assigned = {}
+        # Last row of the table already loaded
+        self.last_row_id = 0
+        self._lock = threading.Lock()
+
+        if db_path:
+            if os.path.dirname(db_path):
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            with self.connect() as connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS merchant_clusters (
+                        id INTEGER PRIMARY KEY,
+                        text TEXT NOT NULL UNIQUE,
+                        label TEXT NOT NULL,
+                        starts_cluster INTEGER NOT NULL
+                    )
+                """)
+                self.load_new_rows(connection)
+
+    @contextmanager
+    def connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def load_new_rows(self, connection):
+        # Add the assignments stored since the last load (by this or another process), in
+        # the order they were made
+        for row_id, text, label, starts_cluster in connection.execute(
+                "SELECT id, text, label, starts_cluster FROM merchant_clusters WHERE id > ? ORDER BY id",
+                (self.last_row_id,)):
+            if starts_cluster:
+                self.cluster_labels.append(label)
+                self.index.add(text)
+            self.assigned[text] = label
+            self.last_row_id = row_id
+
+    def merchant_words(self, description_key):
+        # Letters-only words of a normalised description (see Common.ClassificationCache)
+        # without the masked parts and the payment/location words; digits the OCR read in place
+        # of letters are turned back into letters first, so "H0CK" stays one word
+        text = re.sub(r'<[A-Z]+>', ' ', description_key.upper())
+        text = re.sub(r'(?<=[A-Z])[0158]+|[0158]+(?=[A-Z])', lambda m: m.group().translate(OCR_CONFUSIONS), text)
+        words = re.sub(r'[^A-Z ]', ' ', text).split()
+        return ' '.join(word for word in words if word not in CLUSTER_STOP_WORDS and len(word) > 1)
+
+    def assign(self, description_key):
+        # The cluster label of a description, None if nothing merchant-like is left of it
+        words = self.merchant_words(description_key)
+        if not words:
+            return None
+        text = fold(words)
+        with self._lock:
+            if text in self.assigned:
+                return self.assigned[text]
+            if not self.db_path:
+                return self.assign_new(text, words)
+            with self.connect() as connection:
+                # One writer at a time across processes: pick up what the others assigned
+                # before deciding, so they all agree on the label
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    self.load_new_rows(connection)
+                    if text not in self.assigned:
+                        starts_cluster = len(self.cluster_labels)
+                        label = self.assign_new(text, words)
+                        self.last_row_id = connection.execute(
+                            "INSERT INTO merchant_clusters (text, label, starts_cluster) VALUES (?, ?, ?)",
+                            (text, label, len(self.cluster_labels) > starts_cluster)).lastrowid
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+            return self.assigned[text]
+
+    def assign_new(self, text, words):
+        # Join the closest cluster of a text not seen before, or start a new one; the caller
+        # holds the lock
+        max_distance = int(len(text) * self.max_distance_ratio)
+        best = None
+        for item_id in self.index.candidates(text, MIN_TRIGRAM_OVERLAP, MAX_CANDIDATES):
+            distance = edit_distance(text, self.index.items[item_id], max_distance)
+            if distance <= max_distance and (best is None or distance < best[1]):
+                best = (item_id, distance)
+        if best is None:
+            self.cluster_labels.append(words.title())
+            best = (self.index.add(text), 0)
+        self.assigned[text] = self.cluster_labels[best[0]]
+        return self.assigned[text]
@@ -0,0 +1,30 @@
+import os
+import shutil
+import tempfile
+
+
+class JobWorkspace:
+    """
+    Private scratch directory for one conversion job.
+
+    Every job gets a uniquely named directory under base_dir for its upload and page
+    images, so concurrent jobs never share or delete each other's files. Use it as a
+    context manager to have it removed when the job finishes or fails.
+    """
+
+    def __init__(self, base_dir="workspaces"):
+        os.makedirs(base_dir, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix="job_", dir=base_dir)
+
+    def file_path(self, file_name):
+        return os.path.join(self.path, file_name)
+
+    def clean_up(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.clean_up()
+        return False
@@ -0,0 +1,69 @@
+import csv
+import json
+import os
+from dataclasses import dataclass
+
+from Common.AhoCorasick import AhoCorasick
+
+# Known merchants; a CSV (pattern,merchant,payment_method,category) or a JSON list of
+# objects with the same keys (override with MERCHANT_DICTIONARY_PATH)
+MERCHANT_DICTIONARY_PATH = os.getenv("MERCHANT_DICTIONARY_PATH",
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)), "merchants.csv"))
+
+
+@dataclass(frozen=True)
+class MerchantEntry:
+    pattern: str
+    merchant: str
+    payment_method: str = ""
+    category: str = ""
+
+
+class MerchantDictionary:
+    """
+    Aho-Corasick automaton over the patterns of every known merchant.
+
+    The automaton is built once; matching a description walks it one character at a time,
+    so the cost is linear in the length of the description whatever the size of the
+    dictionary. Matching is case-insensitive and the longest pattern found wins (ties go to
+    the one that ends first), so "SHOPEE PAY" beats "SHOPEE".
+    """
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.automaton = AhoCorasick(entry.pattern.upper() for entry in self.entries)
+
+    def find_all(self, text):
+        # (end position, entry) of every pattern occurring in text
+        for position, index in self.automaton.find_all(text.upper()):
+            yield position, self.entries[index]
+
+    def match(self, text):
+        # The entry of the longest pattern in text, None if no merchant matches
+        best = None
+        for _, entry in self.find_all(text):
+            if best is None or len(entry.pattern) > len(best.pattern):
+                best = entry
+        return best
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def load_merchant_dictionary(path=MERCHANT_DICTIONARY_PATH):
+    if path.lower().endswith(".json"):
+        with open(path) as file:
+            rows = json.load(file)
+    else:
+        with open(path, newline="") as file:
+            rows = list(csv.DictReader(file))
+
+    entries = []
+    for row in rows:
+        pattern = (row.get("pattern") or "").strip()
+        if not pattern:
+            continue
+        entries.append(MerchantEntry(pattern=pattern, merchant=(row.get("merchant") or pattern).strip(),
+                                     payment_method=(row.get("payment_method") or "").strip(),
+                                     category=(row.get("category") or "").strip()))
+    return MerchantDictionary(entries)
@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from Common.TransactionSchema import ROLLUP_FROM_TRANSACTIONS, ROLLUP_TABLE, TRANSACTIONS_TABLE
+
+# Columns load() returns for every inserted transaction, the input of rollup_deltas
+ROLLUP_SOURCE_COLUMNS = ['transaction_date', 'bank', 'category', 'amount']
+UNKNOWN = 'Unknown'
+
+
+def rollup_deltas(inserted_rows):
+    # {(month, bank, category): [total, income, spend, count, min, max]} of newly inserted
+    # (transaction_date, bank, category, amount) rows
+    deltas = {}
+    for transaction_date, bank, category, amount in inserted_rows:
+        amount = Decimal(amount)
+        key = (transaction_date.replace(day=1), bank, category or UNKNOWN)
+        delta = deltas.get(key)
+        if delta is None:
+            deltas[key] = [amount, max(amount, 0), min(amount, 0), 1, amount, amount]
+        else:
+            delta[0] += amount
+            delta[1] += max(amount, 0)
+            delta[2] += min(amount, 0)
+            delta[3] += 1
+            delta[4] = min(delta[4], amount)
+            delta[5] = max(delta[5], amount)
+    return deltas
+
+
+def apply_rollup_deltas(connection, deltas):
+    # Add the deltas to the rollup table, on the caller's connection (so in the same transaction
+    # as the insert they summarise); keys are updated in order so concurrent ingests touching
+    # the same months cannot deadlock
+    if not deltas:
+        return
+    connection.execute(text(f"""
+        INSERT INTO {ROLLUP_TABLE} (month, bank, category, total_amount, income_amount, spend_amount,
+                                    transaction_count, min_amount, max_amount)
+        VALUES (:month, :bank, :category, :total, :income, :spend, :count, :min, :max)
+        ON CONFLICT (month, bank, category) DO UPDATE SET
+            total_amount = {ROLLUP_TABLE}.total_amount + EXCLUDED.total_amount,
+            income_amount = {ROLLUP_TABLE}.income_amount + EXCLUDED.income_amount,
+            spend_amount = {ROLLUP_TABLE}.spend_amount + EXCLUDED.spend_amount,
+            transaction_count = {ROLLUP_TABLE}.transaction_count + EXCLUDED.transaction_count,
+            min_amount = LEAST({ROLLUP_TABLE}.min_amount, EXCLUDED.min_amount),
+            max_amount = GREATEST({ROLLUP_TABLE}.max_amount, EXCLUDED.max_amount)
+    """), [{"month": month, "bank": bank, "category": category, "total": total, "income": income, "spend": spend,
+            "count": count, "min": minimum, "max": maximum}
+           for (month, bank, category), (total, income, spend, count, minimum, maximum) in sorted(deltas.items())])
+
+
+def rebuild_rollups(connection):
+    # Recompute the whole rollup table from the transactions table; ingests wait until it is
+    # done (SHARE mode blocks inserts but not reads). Returns the number of rollup rows.
+    connection.execute(text(f"LOCK TABLE {TRANSACTIONS_TABLE} IN SHARE MODE"))
+    connection.execute(text(f"LOCK TABLE {ROLLUP_TABLE} IN EXCLUSIVE MODE"))
+    connection.execute(text(f"DELETE FROM {ROLLUP_TABLE}"))
+    return connection.execute(text(ROLLUP_FROM_TRANSACTIONS)).rowcount
+
+
+def monthly_totals(connection, bank=None, start_month=None, end_month=None):
+    # Rollup rows (as dicts), optionally for one bank and an inclusive range of months
+    conditions = []
+    parameters = {}
+    if bank:
+        conditions.append("bank = :bank")
+        parameters["bank"] = bank.upper()
+    if start_month:
+        conditions.append("month >= date_trunc('month', CAST(:start_month AS date))")
+        parameters["start_month"] = start_month
+    if end_month:
+        conditions.append("month <= date_trunc('month', CAST(:end_month AS date))")
+        parameters["end_month"] = end_month
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    result = connection.execute(text(f"""
+        SELECT month, bank, category, total_amount, income_amount, spend_amount, transaction_count,
+               min_amount, max_amount
+        FROM {ROLLUP_TABLE} {where}
+        ORDER BY month, bank, category
+    """), parameters)
+    return [dict(row._mapping) for row in result]
+
+
+if __name__ == "__main__":
+    # Full rebuild, e.g. after fixing categories directly in the transactions table:
+    #   python -m Common.MonthlyRollups
+    from Common.Database import DATABASE
+
+    with DATABASE.begin() as connection:
+        rollup_rows = rebuild_rollups(connection)
+    print(f"Rebuilt {ROLLUP_TABLE}: {rollup_rows} rows")
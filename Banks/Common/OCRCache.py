@@ -0,0 +1,127 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Bump when the table layout or the meaning of a key changes; older caches are dropped
+SCHEMA_VERSION = 2
+
+
+class OCRCache:
+    """
+    Persistent per-page OCR text cache backed by SQLite.
+
+    Entries are keyed by the PDF's content hash, the page number, the render DPI, the
+    Tesseract config string and the image preprocessing variant (e.g. the crop applied).
+    The least recently used entries are evicted once the stored text exceeds max_bytes.
+    """
+
+    def __init__(self, db_path, max_bytes=256 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                connection.execute("DROP TABLE IF EXISTS ocr_pages")
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_pages (
+                    content_hash TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    dpi INTEGER NOT NULL,
+                    config TEXT NOT NULL,
+                    variant TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (content_hash, page, dpi, config, variant)
+                )
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS ocr_pages_last_access ON ocr_pages (last_access)")
+
+    @contextmanager
+    def connect(self):
+        # One short-lived connection per call keeps the cache safe to share between threads
+        # and worker processes
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def file_hash(pdf_path):
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, content_hash, page, dpi, config, variant=""):
+        key = (content_hash, page, dpi, config, variant)
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT text FROM ocr_pages "
+                "WHERE content_hash = ? AND page = ? AND dpi = ? AND config = ? AND variant = ?",
+                key).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE ocr_pages SET last_access = ? "
+                    "WHERE content_hash = ? AND page = ? AND dpi = ? AND config = ? AND variant = ?",
+                    (time.time(),) + key)
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if row is None else row[0]
+
+    def put(self, content_hash, page, dpi, config, text, variant=""):
+        size = len(text.encode('utf-8'))
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO ocr_pages (content_hash, page, dpi, config, variant, text, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, page, dpi, config, variant, text, size, time.time()))
+            self.evict(connection)
+
+    def evict(self, connection):
+        # Drop least recently used pages until the cache fits in max_bytes again
+        total_bytes = connection.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_pages").fetchone()[0]
+        excess = total_bytes - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        for rowid, size in connection.execute("SELECT rowid, size FROM ocr_pages ORDER BY last_access"):
+            evicted.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM ocr_pages WHERE rowid = ?", evicted)
+        with self._lock:
+            self.evictions += len(evicted)
+
+    def stats(self):
+        with self.connect() as connection:
+            entries, total_bytes = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_pages").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,132 @@
+import atexit
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytesseract
+
+from Common.PageOCR import TESSERACT_CONFIG
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# The Tesseract engine owned by the current worker process (None when tesserocr is not
+# installed, in which case the worker falls back to pytesseract)
+engine = None
+engine_config = TESSERACT_CONFIG
+
+
+def parse_config(config):
+    # Translate a pytesseract style config ("--psm 6 --oem 1") into tesserocr arguments
+    options = {}
+    psm = re.search(r'--psm\s+(\d+)', config)
+    if psm:
+        options["psm"] = int(psm.group(1))
+    oem = re.search(r'--oem\s+(\d+)', config)
+    if oem:
+        options["oem"] = int(oem.group(1))
+    return options
+
+
+def init_engine(config, lang):
+    # Runs once in every worker process: load the language model a single time and keep
+    # the engine around for every page this process OCRs afterwards
+    global engine, engine_config
+    engine_config = config
+    if tesserocr is None:
+        print("Warning: tesserocr is not installed, falling back to one tesseract process per page")
+        return
+    engine = tesserocr.PyTessBaseAPI(lang=lang, **parse_config(config))
+    atexit.register(engine.End)
+
+
+def ocr_with_engine(image):
+    if engine is None:
+        return pytesseract.image_to_string(image, config=engine_config)
+    # The image is handed to the already loaded engine in memory, no temp file or fork
+    engine.SetImage(image)
+    return engine.GetUTF8Text()
+
+
+def engine_ready():
+    return engine is not None
+
+
+class PageOCRJob:
+    """
+    One page submitted to an OCREnginePool.
+
+    If a worker dies while the page is queued or being read (e.g. a crash inside Tesseract),
+    the whole executor is broken; result() then has the pool start a new one and submits the
+    page again, once.
+    """
+
+    def __init__(self, pool, image):
+        self.pool = pool
+        self.image = image
+        self.executor, self.future = pool.submit_to_executor(image)
+
+    def result(self):
+        try:
+            return self.future.result()
+        except BrokenProcessPool:
+            self.pool.restart(self.executor)
+            _, future = self.pool.submit_to_executor(self.image)
+            return future.result()
+
+
+class OCREnginePool:
+    """
+    Long-lived pool of worker processes, each holding a loaded Tesseract engine.
+
+    Create it once when the service starts and share it between requests; pages are
+    submitted as in-memory images and OCR'd by whichever engine is free. A pool broken by
+    a crashed worker is replaced by a new one instead of failing every later request.
+    """
+
+    def __init__(self, workers=None, config=TESSERACT_CONFIG, lang="eng"):
+        self.workers = workers or os.cpu_count() or 1
+        self.config = config
+        self.lang = lang
+        self._lock = threading.Lock()
+        self.restarts = 0
+        self.executor = self.new_executor()
+
+    def new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=init_engine,
+                                   initargs=(self.config, self.lang))
+
+    def restart(self, broken_executor):
+        # Replace broken_executor, unless another request already has
+        with self._lock:
+            if self.executor is broken_executor:
+                print("Warning: an OCR worker died, starting a new engine pool")
+                broken_executor.shutdown(wait=False)
+                self.executor = self.new_executor()
+                self.restarts += 1
+
+    def submit_to_executor(self, image):
+        # (executor, future) of image submitted to the current executor
+        executor = self.executor
+        try:
+            return executor, executor.submit(ocr_with_engine, image)
+        except BrokenProcessPool:
+            self.restart(executor)
+            executor = self.executor
+            return executor, executor.submit(ocr_with_engine, image)
+
+    def warm_up(self):
+        # Start every worker (and load every engine) now rather than on the first upload
+        futures = [self.executor.submit(engine_ready) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def submit(self, image):
+        return PageOCRJob(self, image)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
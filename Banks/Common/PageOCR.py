@@ -0,0 +1,293 @@
+import copy
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+from Common.RenderProfiles import adaptive_threshold, get_render_profile
+from Common.TextLayer import extract_text_layer, is_usable_text
+from Common.TransactionTokenizer import section_marker
+
+TESSERACT_CONFIG = '--psm 6 --oem 1'
+# Pixels darker than this count as content when trimming blank page margins, and the
+# trimmed crop keeps this much white border around the content for Tesseract
+MARGIN_THRESHOLD = 200
+MARGIN_PADDING = 20
+
+
+def ocr_image(image, config=TESSERACT_CONFIG):
+    # Kept at module level so it can be pickled into the worker processes
+    return pytesseract.image_to_string(image, config=config)
+
+
+def section_found(text, section_markers):
+    # Whether text holds the start marker and, after it, the end marker (see section_marker)
+    start_marker, end_marker = (section_marker(marker) for marker in section_markers)
+    start = start_marker.search(text)
+    return start is not None and end_marker.search(text, start.end()) is not None
+
+
+def crop_to_roi(image, roi):
+    # roi is (left, top, right, bottom) as fractions of the page size
+    left, top, right, bottom = roi
+    width, height = image.size
+    return image.crop((int(left * width), int(top * height), int(right * width), int(bottom * height)))
+
+
+def trim_margins(image, threshold=MARGIN_THRESHOLD, padding=MARGIN_PADDING):
+    # Crop to the bounding box of everything that is not (near) white
+    mask = image.convert("L").point(lambda value: 255 if value < threshold else 0)
+    bbox = mask.getbbox()
+    if bbox is None:
+        return image
+    left, top, right, bottom = bbox
+    return image.crop((max(left - padding, 0), max(top - padding, 0),
+                       min(right + padding, image.width), min(bottom + padding, image.height)))
+
+
+def page_windows(page_numbers, window):
+    # Group sorted page numbers into runs of consecutive pages, at most `window` long
+    run = []
+    for page_number in page_numbers:
+        if run and (page_number != run[-1] + 1 or len(run) >= window):
+            yield run[0], run[-1]
+            run = []
+        run.append(page_number)
+    if run:
+        yield run[0], run[-1]
+
+
+def page_count(pdf_path, poppler_path=None):
+    return pdfinfo_from_path(pdf_path, poppler_path=poppler_path)["Pages"]
+
+
+def iter_page_images(pdf_path, poppler_path=None, window=1, page_numbers=None, **render_options):
+    # Render the PDF a few pages at a time using pdf2image's page ranges instead of
+    # materialising every page up front; each window is released before the next one
+    if page_numbers is None:
+        page_numbers = range(1, page_count(pdf_path, poppler_path=poppler_path) + 1)
+    for first_page, last_page in page_windows(sorted(page_numbers), window):
+        images = convert_from_path(pdf_path, poppler_path=poppler_path, first_page=first_page,
+                                   last_page=last_page, **render_options)
+        for offset, image in enumerate(images):
+            yield first_page + offset, image
+        images = None
+
+
+class PageOCR:
+    def __init__(self, workers=1, config=TESSERACT_CONFIG, stream=False, render_window=1, render_profile="default",
+                 cache=None,
+                 engine_pool=None, prune_to_section=False, scout_dpi=100, trim_page_margins=True):
+        # workers=None (or 0) means one worker process per CPU core
+        self.workers = workers or os.cpu_count() or 1
+        self.config = config
+        # Optional shared OCREnginePool; when set its long-lived engines do the OCR
+        # instead of a pool spawned per statement
+        self.engine_pool = engine_pool
+        if engine_pool is not None:
+            self.workers = engine_pool.workers
+            self.config = engine_pool.config
+        # Named render profile (DPI, grayscale, adaptive thresholding)
+        self.apply_profile(get_render_profile(render_profile))
+        # Optional OCRCache; pages found in it are neither rendered nor OCR'd
+        self.cache = cache
+        # stream=True renders render_window pages at a time so peak memory does not
+        # grow with the number of pages in the PDF
+        self.stream = stream
+        self.render_window = max(1, render_window)
+        # prune_to_section=True first finds the pages holding the transaction section with a
+        # text layer / scout_dpi pass and only OCRs those at full resolution
+        self.prune_to_section = prune_to_section
+        self.scout_dpi = scout_dpi
+        # Blank page margins are cropped away before OCR
+        self.trim_page_margins = trim_page_margins
+
+    def apply_profile(self, profile):
+        # See Common.RenderProfiles for the available profiles
+        self.profile_name = profile.name
+        self.dpi = profile.dpi
+        self.grayscale = profile.grayscale
+        self.adaptive_threshold = profile.adaptive_threshold
+
+    def with_profile(self, render_profile):
+        # Copy of this PageOCR (sharing its cache and engine pool) rendering with another profile
+        page_ocr = copy.copy(self)
+        page_ocr.apply_profile(get_render_profile(render_profile))
+        return page_ocr
+
+    def render_pages(self, pdf_path, poppler_path=None, pages=None):
+        render_options = {"dpi": self.dpi, "grayscale": self.grayscale, "fmt": "png"}
+        if self.stream:
+            return iter_page_images(pdf_path, poppler_path=poppler_path, window=self.render_window,
+                                    page_numbers=pages, **render_options)
+        if pages is not None:
+            return list(iter_page_images(pdf_path, poppler_path=poppler_path, window=len(pages) or 1,
+                                         page_numbers=pages, **render_options))
+        images = convert_from_path(pdf_path, poppler_path=poppler_path, **render_options)
+        return enumerate(images, start=1)
+
+    def ocr_pdf(self, pdf_path, poppler_path=None, image_folder=None, use_text_layer=False, section_markers=None,
+                roi=None, on_pruned_page=None):
+        # Yields (page_number, text) for every page, in page order. With use_text_layer the
+        # PDF's embedded text is used for every page that passes the quality check and
+        # only the remaining pages are rasterised and OCR'd. With section_markers
+        # (start_marker, end_marker) and prune_to_section set, only the pages holding
+        # that section are OCR'd at full quality. With roi only that region of each page
+        # (e.g. the transaction table) is OCR'd; it must still contain the markers. The cheap
+        # text of pages pruned before the section (e.g. a cover page printing the statement
+        # period) is handed to on_pruned_page(page_number, text). The markers were tuned on
+        # OCR output, so a text layer in which they cannot be found is OCR'd instead
+        prune = self.prune_to_section and section_markers is not None
+        if not use_text_layer and not prune:
+            yield from self.ocr_pages(pdf_path, poppler_path=poppler_path, image_folder=image_folder, roi=roi)
+            return
+
+        text_layer = extract_text_layer(pdf_path)
+        if text_layer is None:
+            text_layer = [""] * page_count(pdf_path, poppler_path=poppler_path)
+        page_numbers = list(range(1, len(text_layer) + 1))
+        if prune:
+            page_numbers = self.locate_section_pages(pdf_path, page_numbers, section_markers,
+                                                     poppler_path=poppler_path, text_layer=text_layer,
+                                                     on_pruned_page=on_pruned_page)
+
+        layer_pages = {}
+        if use_text_layer:
+            layer_pages = {page_number: text_layer[page_number - 1] for page_number in page_numbers
+                           if is_usable_text(text_layer[page_number - 1])}
+            layer_text = "\n".join(layer_pages.values())
+            if layer_pages and section_markers is not None and not section_found(layer_text, section_markers):
+                print("Warning: section markers not found in the text layer, OCRing its pages instead")
+                layer_pages = {}
+            print(f"Text layer used for {len(layer_pages)} of {len(page_numbers)} page(s)")
+        ocr_page_numbers = [page_number for page_number in page_numbers if page_number not in layer_pages]
+        ocr_results = self.ocr_pages(pdf_path, poppler_path=poppler_path, image_folder=image_folder,
+                                     pages=ocr_page_numbers, roi=roi) if ocr_page_numbers else iter(())
+        for page_number in page_numbers:
+            if page_number in layer_pages:
+                yield page_number, layer_pages[page_number]
+            else:
+                yield next(ocr_results)
+
+    def locate_section_pages(self, pdf_path, page_numbers, section_markers, poppler_path=None, text_layer=None,
+                             on_pruned_page=None):
+        # Cheap first pass: read each page from its text layer, or OCR it at scout_dpi when
+        # the text layer is unusable, and keep the pages from the one holding the start
+        # marker up to the one holding the end marker; the pages before it are passed to
+        # on_pruned_page
+        # The same marker regexes as the parser's, so a page kept as the section also parses
+        start_marker, end_marker = (section_marker(marker) for marker in section_markers)
+        layer_pages = {page_number: text_layer[page_number - 1] for page_number in page_numbers
+                       if text_layer and is_usable_text(text_layer[page_number - 1])}
+        scout = copy.copy(self)
+        scout.dpi = self.scout_dpi
+        scout.adaptive_threshold = False
+        scout_results = scout.ocr_pages(pdf_path, poppler_path=poppler_path,
+                                        pages=[page_number for page_number in page_numbers
+                                               if page_number not in layer_pages])
+
+        start_page = end_page = None
+        try:
+            for page_number in page_numbers:
+                text = layer_pages[page_number] if page_number in layer_pages else next(scout_results)[1]
+                if start_page is None and start_marker.search(text):
+                    start_page = page_number
+                if start_page is None and on_pruned_page is not None:
+                    on_pruned_page(page_number, text)
+                if start_page is not None and end_marker.search(text):
+                    end_page = page_number
+                    break
+        finally:
+            scout_results.close()
+
+        if start_page is None:
+            print("Warning: transaction section not found in the scouting pass, OCRing every page")
+            return page_numbers
+        section_pages = [page_number for page_number in page_numbers
+                         if start_page <= page_number and (end_page is None or page_number <= end_page)]
+        print(f"Transaction section found on page(s) {section_pages[0]}-{section_pages[-1]} of {len(page_numbers)}")
+        return section_pages
+
+    def ocr_pages(self, pdf_path, poppler_path=None, image_folder=None, pages=None, roi=None):
+        # Yields (page_number, text) for the given pages (all of them by default),
+        # serving whatever it can from the cache before rendering anything
+        if self.cache is None:
+            yield from self.render_and_ocr(pdf_path, poppler_path=poppler_path, image_folder=image_folder,
+                                           pages=pages, roi=roi)
+            return
+
+        content_hash = self.cache.file_hash(pdf_path)
+        variant = self.variant(roi)
+        if pages is None:
+            pages = range(1, page_count(pdf_path, poppler_path=poppler_path) + 1)
+        cached_pages = {page_number: self.cache.get(content_hash, page_number, self.dpi, self.config, variant)
+                        for page_number in pages}
+        missing_pages = [page_number for page_number, text in cached_pages.items() if text is None]
+        ocr_results = self.render_and_ocr(pdf_path, poppler_path=poppler_path, image_folder=image_folder,
+                                          pages=missing_pages, roi=roi) if missing_pages else iter(())
+
+        for page_number in pages:
+            text = cached_pages[page_number]
+            if text is None:
+                page_number, text = next(ocr_results)
+                self.cache.put(content_hash, page_number, self.dpi, self.config, text, variant)
+            yield page_number, text
+
+    def variant(self, roi=None):
+        # Describes the image preprocessing, so cached text is only reused for identical crops
+        return (f"profile={self.profile_name};grayscale={self.grayscale};threshold={self.adaptive_threshold};"
+                f"roi={roi};trim={self.trim_page_margins}")
+
+    def prepare_image(self, image, roi=None):
+        # Crop the page down to the part worth OCRing: smaller images OCR faster and leave
+        # less header/footer noise for the transaction regexes
+        if roi is not None:
+            image = crop_to_roi(image, roi)
+        if self.trim_page_margins:
+            image = trim_margins(image)
+        if self.adaptive_threshold:
+            image = adaptive_threshold(image)
+        return image
+
+    def render_and_ocr(self, pdf_path, poppler_path=None, image_folder=None, pages=None, roi=None):
+        # Renders and OCRs the given pages (all of them by default), bypassing the cache
+        rendered_pages = ((page_number, self.prepare_image(image, roi)) for page_number, image
+                          in self.render_pages(pdf_path, poppler_path=poppler_path, pages=pages))
+        if image_folder is not None:
+            os.makedirs(image_folder, exist_ok=True)
+
+        if self.engine_pool is not None:
+            yield from self.collect_in_order(rendered_pages, self.engine_pool.submit, image_folder)
+            return
+
+        if self.workers <= 1:
+            for page_number, image in rendered_pages:
+                self.save_page_image(image, page_number, image_folder)
+                yield page_number, ocr_image(image, self.config)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            submit = lambda image: executor.submit(ocr_image, image, self.config)
+            yield from self.collect_in_order(rendered_pages, submit, image_folder)
+
+    def collect_in_order(self, rendered_pages, submit, image_folder):
+        # Fan the pages out across cores while keeping only a bounded number of rendered
+        # pages in flight; results are collected in submission (= page) order
+        max_in_flight = self.workers * 2
+        pending = deque()
+        for page_number, image in rendered_pages:
+            self.save_page_image(image, page_number, image_folder)
+            pending.append((page_number, submit(image)))
+            image = None
+            if len(pending) >= max_in_flight:
+                page_number, future = pending.popleft()
+                yield page_number, future.result()
+        while pending:
+            page_number, future = pending.popleft()
+            yield page_number, future.result()
+
+    def save_page_image(self, image, page_number, image_folder):
+        if image_folder is not None:
+            image.save(os.path.join(image_folder, f"page_{page_number}.png"), 'PNG')
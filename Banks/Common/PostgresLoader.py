@@ -0,0 +1,108 @@
+import csv
+import io
+
+import pandas as pd
+from sqlalchemy import text
+
+# Rows sent per COPY, so a multi-year backfill never has to sit in one in-memory CSV
+COPY_CHUNK_ROWS = 50000
+# How missing values are written for COPY; in COPY's CSV format an unquoted empty field
+# would also read as NULL, so empty strings could not be told apart from missing values
+COPY_NULL = r'\N'
+
+
+def postgres_type(dtype):
+    # Column type for a pandas dtype, the same choices to_sql makes
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "TIMESTAMP"
+    if pd.api.types.is_bool_dtype(dtype):
+        return "BOOLEAN"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(dtype):
+        return "DOUBLE PRECISION"
+    return "TEXT"
+
+
+class PostgresLoader:
+    """
+    Appends or upserts a DataFrame into a PostgreSQL table.
+
+    Rows are streamed with COPY FROM STDIN into a temporary staging table and merged into the
+    target with one INSERT ... SELECT ... ON CONFLICT, all on the caller's connection, so the
+    load commits or rolls back with the rest of the caller's transaction. The target table
+    is created on first use and gains any new columns of the DataFrame; it is never dropped,
+    so earlier uploads are kept.
+
+    Without conflict_columns rows are appended (ON CONFLICT DO NOTHING skips rows that
+    violate a unique index). With them a unique index on conflict_columns is created and
+    rows whose conflict_columns already exist are updated, or skipped with
+    skip_existing=True. With create_table=False the table and its indexes must already exist
+    (e.g. created by a migration) and are left as they are. With returning (a list of
+    columns) load returns those columns of every row it inserted or updated, e.g. to
+    maintain summaries of only the new rows.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.quote = connection.dialect.identifier_preparer.quote
+
+    def column_list(self, columns):
+        return ", ".join(self.quote(column) for column in columns)
+
+    def ensure_table(self, table_name, df):
+        column_types = ", ".join(f"{self.quote(column)} {postgres_type(dtype)}" for column, dtype in df.dtypes.items())
+        self.connection.execute(text(f"CREATE TABLE IF NOT EXISTS {self.quote(table_name)} ({column_types})"))
+        for column, dtype in df.dtypes.items():
+            self.connection.execute(text(f"ALTER TABLE {self.quote(table_name)} "
+                                         f"ADD COLUMN IF NOT EXISTS {self.quote(column)} {postgres_type(dtype)}"))
+
+    def ensure_unique_index(self, table_name, columns):
+        index_name = "_".join([table_name] + [column.lower().replace(" ", "_") for column in columns] + ["key"])
+        self.connection.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {self.quote(index_name)} "
+                                     f"ON {self.quote(table_name)} ({self.column_list(columns)})"))
+
+    def copy_rows(self, table_name, df):
+        # COPY the DataFrame into table_name, COPY_CHUNK_ROWS rows at a time; missing values
+        # (None, NaN, NaT) are NULL and empty strings stay empty strings
+        cursor = self.connection.connection.cursor()
+        try:
+            statement = (f"COPY {self.quote(table_name)} ({self.column_list(df.columns)}) FROM STDIN "
+                         f"WITH (FORMAT csv, NULL '{COPY_NULL}')")
+            for start in range(0, len(df), COPY_CHUNK_ROWS):
+                buffer = io.StringIO()
+                df.iloc[start:start + COPY_CHUNK_ROWS].to_csv(buffer, index=False, header=False, na_rep=COPY_NULL,
+                                                              quoting=csv.QUOTE_MINIMAL)
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+        finally:
+            cursor.close()
+
+    def load(self, df, table_name, conflict_columns=None, skip_existing=False, create_table=True, returning=None):
+        # Number of rows inserted or updated, or their returning columns
+        if create_table:
+            self.ensure_table(table_name, df)
+            if conflict_columns:
+                self.ensure_unique_index(table_name, conflict_columns)
+        staging_table = f"{table_name}_staging"
+        self.connection.execute(text(f"CREATE TEMPORARY TABLE {self.quote(staging_table)} "
+                                     f"(LIKE {self.quote(table_name)} INCLUDING DEFAULTS) ON COMMIT DROP"))
+        self.copy_rows(staging_table, df)
+
+        columns = self.column_list(df.columns)
+        if conflict_columns:
+            updates = ", ".join(f"{self.quote(column)} = EXCLUDED.{self.quote(column)}"
+                                for column in df.columns if column not in conflict_columns)
+            on_conflict = (f"ON CONFLICT ({self.column_list(conflict_columns)}) "
+                           + (f"DO UPDATE SET {updates}" if updates and not skip_existing else "DO NOTHING"))
+        else:
+            on_conflict = "ON CONFLICT DO NOTHING"
+        returning_clause = f" RETURNING {self.column_list(returning)}" if returning else ""
+        result = self.connection.execute(text(
+            f"INSERT INTO {self.quote(table_name)} ({columns}) "
+            f"SELECT {columns} FROM {self.quote(staging_table)} {on_conflict}{returning_clause}"))
+        returned = result.fetchall() if returning else None
+        # The staging table only lives until the commit; drop it now so a second load in the
+        # same transaction can create it again
+        self.connection.execute(text(f"DROP TABLE {self.quote(staging_table)}"))
+        return returned if returning else result.rowcount
@@ -0,0 +1,43 @@
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+
+RenderProfile = namedtuple("RenderProfile", ["name", "dpi", "grayscale", "adaptive_threshold"])
+
+# Named ways of rasterising a page for OCR. "default" matches the original colour
+# rendering; grayscale pages are a third of the size to encode and hold, and Tesseract
+# binarises them internally anyway
+RENDER_PROFILES = {
+    "default": RenderProfile(name="default", dpi=200, grayscale=False, adaptive_threshold=False),
+    "fast": RenderProfile(name="fast", dpi=200, grayscale=True, adaptive_threshold=False),
+    "accurate": RenderProfile(name="accurate", dpi=300, grayscale=True, adaptive_threshold=True),
+}
+
+# Neighbourhood (in pixels) and offset used by the adaptive threshold
+THRESHOLD_BLOCK_SIZE = 31
+THRESHOLD_OFFSET = 10
+
+
+def get_render_profile(profile):
+    if isinstance(profile, RenderProfile):
+        return profile
+    if profile not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile '{profile}', expected one of {sorted(RENDER_PROFILES)}")
+    return RENDER_PROFILES[profile]
+
+
+def adaptive_threshold(image, block_size=THRESHOLD_BLOCK_SIZE, offset=THRESHOLD_OFFSET):
+    # Binarise against the mean of each pixel's block_size x block_size neighbourhood, computed
+    # for the whole page at once from an integral image. Unlike a global threshold this keeps
+    # text readable on shaded table rows and faint scans
+    pixels = np.asarray(image.convert("L"), dtype=np.float64)
+    pad = block_size // 2
+    padded = np.pad(pixels, pad, mode="edge")
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1))
+    integral[1:, 1:] = padded.cumsum(axis=0).cumsum(axis=1)
+    window_sum = (integral[block_size:, block_size:] - integral[:-block_size, block_size:]
+                  - integral[block_size:, :-block_size] + integral[:-block_size, :-block_size])
+    local_mean = window_sum / (block_size * block_size)
+    binary = np.where(pixels > local_mean - offset, 255, 0).astype(np.uint8)
+    return Image.fromarray(binary, mode="L")
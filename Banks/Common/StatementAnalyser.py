@@ -0,0 +1,58 @@
+import pandas as pd
+from Common.DescriptionClassifier import DESCRIPTION_CLASSIFIER
+
+
+class StatementAnalyser:
+    """
+    Enriches parsed transactions with the fields of the DescriptionClassifier.
+
+    The transactions come either straight from a StatementProcessor (a DataFrame, or the
+    records yielded by iter_transactions) or from a CSV exported earlier. Given a DataFrame
+    nothing is serialised or re-parsed, so the typed columns of the parser survive: a column
+    the parser already filled with dates is kept rather than replaced by the date text found
+    in the description. Without a classifier the in-memory DESCRIPTION_CLASSIFIER is used.
+    """
+
+    def __init__(self, csv_path=None, file_name=None, temp_image_folder="temp_images", data_frame=None,
+                 classifier=None):
+        self.csv_path = csv_path
+        self.temp_image_folder = temp_image_folder
+        self.file_name = file_name
+        self.data_frame = data_frame
+        self.classifier = classifier if classifier is not None else DESCRIPTION_CLASSIFIER
+
+    def import_csv(self):
+        self.data_frame = pd.read_csv(self.csv_path)
+
+    def export_csv(self, csv_path):
+        self.data_frame.to_csv(csv_path, index=False)
+
+    def load(self, transactions=None):
+        # A DataFrame or an iterable of transaction dicts; otherwise the frame given at
+        # construction, or the CSV at csv_path
+        if isinstance(transactions, pd.DataFrame):
+            self.data_frame = transactions
+        elif transactions is not None:
+            self.data_frame = pd.DataFrame.from_records(list(transactions))
+        elif self.data_frame is None:
+            self.import_csv()
+        return self.data_frame
+
+    def description_regex(self, description):
+        # Classification of a single description, see classify_transactions
+        return self.classifier.classify_one(description)
+
+    def classify_transactions(self, transactions=None):
+        self.load(transactions)
+        if 'Description' not in self.data_frame.columns:
+            print("Error: 'Description' column not found in the DataFrame")
+            return self.data_frame
+        # Every field is extracted for the whole Description column at once and assigned as
+        # one column (see Common.DescriptionClassifier)
+        classified_transactions = self.classifier.classify(self.data_frame['Description'])
+        for column in classified_transactions.columns:
+            if column in self.data_frame.columns and pd.api.types.is_datetime64_any_dtype(self.data_frame[column]):
+                continue
+            self.data_frame[column] = classified_transactions[column]
+
+        return self.data_frame
@@ -0,0 +1,85 @@
+import re
+
+import pandas as pd
+
+# Day and month printed without a space by the OCR ("05Aug")
+DAY_MONTH = r'(\d{2})\s*([A-Za-z]{3})\b'
+# Leap year the day-month strings are parsed in, so "29 Feb" is valid before the real
+# year is known
+PARSE_YEAR = 2000
+# Dates up to this long after the end of the statement period still belong to its year
+YEAR_ROLLOVER_GRACE = pd.Timedelta(days=7)
+
+
+def parse_full_date(text):
+    # "01Jul2024", "01 July 2024", "01/07/2024" -> Timestamp (NaT if unreadable)
+    text = re.sub(r'(\d)([A-Za-z])', r'\1 \2', text)
+    text = re.sub(r'([A-Za-z])(\d)', r'\1 \2', text)
+    return pd.to_datetime(text.replace(',', ' '), dayfirst=True, errors="coerce")
+
+
+def find_statement_period(text, patterns):
+    # (start, end) of the statement period printed on the page, start may be None; None if
+    # no pattern matches. Patterns name their dates with the groups "start" and "end"
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if not match:
+            continue
+        end = parse_full_date(match.group("end"))
+        if pd.isna(end):
+            continue
+        start = parse_full_date(match.group("start")) if "start" in match.groupdict() else None
+        return (None if start is None or pd.isna(start) else start), end
+    return None
+
+
+def normalise_date_text(column):
+    # Collapse whitespace and put a space between day and month: "05Aug" -> "05 Aug"
+    text = column.astype(str).str.strip().str.replace(r'\s+', ' ', regex=True)
+    return text.str.replace(DAY_MONTH, r'\1 \2', regex=True)
+
+
+def detect_date_format(text, date_formats, sample_size=50):
+    # The format that reads most of a sample of the column
+    sample = text.dropna().head(sample_size)
+    best_format, best_count = None, 0
+    for fmt in date_formats:
+        count = pd.to_datetime(sample + f" {PARSE_YEAR}", format=f"{fmt} %Y", errors="coerce").notna().sum()
+        if count > best_count:
+            best_format, best_count = fmt, count
+    return best_format
+
+
+def parse_dates(column, date_formats, statement_period=None, today=None):
+    """
+    Parse a column of day-month strings ("05 Aug", "05Aug", "05/08") into dates.
+
+    Only the distinct strings are parsed (a statement repeats the same few hundred dates),
+    the format is detected once and every value is parsed with it; only the values it
+    cannot read are retried with the other formats. The year comes from the statement
+    period: dates after its end belong to the year before, so a December transaction on a
+    statement ending in January keeps its own year. Without a period the same rule is
+    applied relative to today.
+    """
+    codes, uniques = pd.factorize(column.fillna("").astype(str))
+    text = normalise_date_text(pd.Series(uniques, dtype=object))
+    suffixed = text + f" {PARSE_YEAR}"
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+
+    detected = detect_date_format(text, date_formats)
+    ordered_formats = [detected] + [fmt for fmt in date_formats if fmt != detected] if detected else []
+    for fmt in ordered_formats:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(suffixed[missing], format=f"{fmt} %Y", errors="coerce")
+
+    period_end = statement_period[1] if statement_period else pd.Timestamp(today or pd.Timestamp.now()).normalize()
+    dates = pd.to_datetime(pd.DataFrame({"year": period_end.year, "month": parsed.dt.month, "day": parsed.dt.day}),
+                           errors="coerce")
+    rolled_back = dates > period_end + YEAR_ROLLOVER_GRACE
+    if rolled_back.any():
+        dates[rolled_back] = pd.to_datetime(pd.DataFrame({"year": period_end.year - 1,
+                                                          "month": parsed.dt.month[rolled_back],
+                                                          "day": parsed.dt.day[rolled_back]}), errors="coerce")
+    return pd.Series(dates.to_numpy()[codes], index=column.index)
@@ -0,0 +1,41 @@
+from Common.StatementProcessor import StatementProcessor
+from Common.StatementSpecs import load_statement_specs
+from Common.TransactionTokenizer import BankStatementTokenizer, CreditCardStatementTokenizer
+
+
+def compile_tokenizer(spec):
+    if spec.layout == "credit_card":
+        return CreditCardStatementTokenizer(row_start=spec.row_start, **spec.fields)
+    return BankStatementTokenizer(row_start=spec.row_start, **spec.fields)
+
+
+class StatementEngine:
+    """
+    Parser engine shared by every bank.
+
+    The tokenizer of every registered statement spec is compiled once, when the engine is
+    created, and reused by every statement processed afterwards.
+    """
+
+    def __init__(self, specs):
+        self.specs = specs
+        self.tokenizers = {key: compile_tokenizer(spec) for key, spec in specs.items()}
+
+    def supports(self, bank, statement="bank"):
+        return (bank, statement) in self.specs
+
+    def statements(self):
+        return sorted(self.specs)
+
+    def lookup(self, bank, statement="bank"):
+        if not self.supports(bank, statement):
+            raise ValueError(f"No statement spec for bank '{bank}' and statement type '{statement}'")
+        return self.specs[(bank, statement)], self.tokenizers[(bank, statement)]
+
+    def processor(self, bank, statement="bank", **options):
+        spec, tokenizer = self.lookup(bank, statement)
+        return StatementProcessor(spec, tokenizer, **options)
+
+
+# Compiled once at import (i.e. at service start) from the spec registry
+STATEMENT_ENGINE = StatementEngine(load_statement_specs())
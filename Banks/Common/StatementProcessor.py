@@ -0,0 +1,219 @@
+import pypdf
+import shutil
+import os
+import pandas as pd
+from Common.PageOCR import PageOCR
+from Common.StatementDates import find_statement_period, normalise_date_text, parse_dates
+from Common.TransactionTokenizer import StreamingStatementParser
+
+
+class StatementProcessor:
+    """
+    Reads one statement PDF and parses its transactions according to a StatementSpec.
+
+    The same code path serves every bank: the spec supplies the section markers, date
+    formats and layout, and the tokenizer (compiled once per spec by the StatementEngine)
+    supplies the row and field patterns.
+    """
+
+    def __init__(self, spec, tokenizer, pdf_path, file_name, temp_image_folder="temp_images", page_ocr=None,
+                 render_profile=None, poppler_path=None):
+        self.spec = spec
+        self.tokenizer = tokenizer
+        self.pdf_path = pdf_path
+        self.temp_image_folder = temp_image_folder
+        self.file_name = file_name
+        self.poppler_path = poppler_path
+        self.text_content = []
+        self.pages_read = 0
+        self.data_frame = None
+        self.regex_patterns = None
+        # (start, end) of the statement period, found on the first page that prints it
+        self.statement_period = None
+        self.page_ocr = page_ocr if page_ocr is not None else PageOCR()
+        # Optionally render this statement with another named profile (see Common.RenderProfiles)
+        render_profile = render_profile if render_profile is not None else spec.render_profile
+        if render_profile is not None:
+            self.page_ocr = self.page_ocr.with_profile(render_profile)
+        # (left, top, right, bottom) fractions of the page holding the transaction table,
+        # None OCRs the whole page
+        self.transaction_roi = spec.roi
+
+        if not os.path.exists(temp_image_folder):
+            os.makedirs(temp_image_folder)
+
+    def extract_text_from_pdf(self):
+        self.text_content.extend(self.iter_text_layer_pages())
+
+    def iter_text_layer_pages(self):
+        with open(self.pdf_path, 'rb') as file:
+            reader = pypdf.PdfReader(file)
+            for page in range(len(reader.pages)):
+                page_obj = reader.pages[page]
+                yield page_obj.extract_text()
+
+    def perform_ocr_on_images(self, use_text_layer=False, section_markers=None, save_images=True):
+        self.text_content.extend(self.iter_ocr_pages(use_text_layer, section_markers, save_images))
+
+    def iter_ocr_pages(self, use_text_layer=False, section_markers=None, save_images=True):
+        # Convert PDF pages to images and perform OCR on each image
+        # (streamed page by page and/or in parallel depending on the PageOCR settings).
+        # With use_text_layer only the pages without a usable text layer are OCR'd, and with
+        # section_markers pages outside the transaction section can be skipped. Pages are
+        # cropped to transaction_roi before OCR
+        # With save_images=False the page images are only kept in memory
+        image_folder = os.path.join(self.temp_image_folder, self.file_name) if save_images else None
+        # Pages pruned before the section are still searched for the statement period
+        for _, text in self.page_ocr.ocr_pdf(self.pdf_path, poppler_path=self.poppler_path, image_folder=image_folder,
+                                             use_text_layer=use_text_layer, section_markers=section_markers,
+                                             roi=self.transaction_roi,
+                                             on_pruned_page=lambda _, text: self.detect_statement_period(text)):
+            yield text
+
+    def iter_page_text(self, use_ocr=False, section_markers=None, save_images=True):
+        # use_ocr="auto" reads the text layer where possible and falls back to OCR per page
+        if use_ocr == "auto":
+            pages = self.iter_ocr_pages(use_text_layer=True, section_markers=section_markers, save_images=save_images)
+        elif use_ocr:
+            pages = self.iter_ocr_pages(section_markers=section_markers, save_images=save_images)
+        else:
+            pages = self.iter_text_layer_pages()
+        for text in pages:
+            self.pages_read += 1
+            yield text
+
+    def clean_up(self):
+        # Only remove this statement's own page images; the shared temp folder itself is only
+        # removed once it is empty, so concurrent jobs keep theirs
+        shutil.rmtree(os.path.join(self.temp_image_folder, self.file_name), ignore_errors=True)
+        try:
+            os.rmdir(self.temp_image_folder)
+        except OSError:
+            pass
+
+    def stream_parser(self, regex_patterns=None):
+        regex_patterns = regex_patterns or self.regex_patterns or self.spec.regex_patterns
+        # With include_summaries an account summary ("Total ...") is returned right after the
+        # transaction row it appears in
+        tokenize_options = {}
+        if self.spec.layout == "bank_account":
+            tokenize_options["include_summaries"] = self.spec.include_summaries
+        return StreamingStatementParser(self.tokenizer, regex_patterns["start_marker"], regex_patterns["end_marker"],
+                                        **tokenize_options)
+
+    def parse_pages(self, pages, regex_patterns=None):
+        # Every field of every transaction is read in one pass (see Common.TransactionTokenizer),
+        # each record as soon as the page holding the end of its row has been read
+        parser = self.stream_parser(regex_patterns)
+        for text in pages:
+            self.detect_statement_period(text)
+            for record in parser.feed(text):
+                yield record.to_dict()
+        for record in parser.finish():
+            yield record.to_dict()
+
+    def iter_transactions(self, use_ocr=False, regex_patterns=None, save_images=True):
+        # Read the statement page by page and yield its transactions while the remaining pages
+        # are still being OCR'd; the page text is not kept
+        self.regex_patterns = regex_patterns or self.spec.regex_patterns
+        # The markers also let the OCR skip pages outside the transaction section
+        section_markers = (self.regex_patterns["start_marker"], self.regex_patterns["end_marker"])
+        yield from self.parse_pages(self.iter_page_text(use_ocr, section_markers, save_images))
+
+    def detect_statement_period(self, text):
+        # The first page printing the statement period sets it
+        if self.statement_period is None and self.spec.statement_period:
+            self.statement_period = find_statement_period(text, self.spec.statement_period)
+
+    def extract_transactions(self):
+        # Transactions of the pages already read into text_content
+        return list(self.parse_pages(self.text_content))
+
+    def process_dates(self):
+        # First, ensure the 'Date' column exists
+        if 'Date' not in self.data_frame.columns:
+            raise ValueError("'Date' column not found in the DataFrame")
+
+        self.data_frame['Date'] = self.parse_date_column(self.data_frame['Date'])
+        return self.data_frame
+
+    def parse_date_column(self, column):
+        # Whole-column parse with the statement's formats, the year taken from the statement
+        # period (see Common.StatementDates)
+        dates = parse_dates(column, self.spec.date_formats, self.statement_period)
+
+        # Check for any remaining NaT values
+        nat_count = dates.isna().sum()
+        if nat_count > 0:
+            print(f"Warning: {nat_count} date(s) could not be parsed.")
+        return dates
+
+    def convert_pdf_to_df(self, array_of_transactions=None):
+        # Bank account statements: withdrawals and deposits are derived from the running balance
+        if array_of_transactions is None:
+            array_of_transactions = self.extract_transactions()
+        # Account summaries ("Total ...") are not transactions, keep them aside
+        summaries = [record for record in array_of_transactions if "Final Balance" in record]
+        transactions = [record for record in array_of_transactions if "Final Balance" not in record]
+
+        self.data_frame = pd.DataFrame(transactions, columns=["Date", "Description", "Account Balance"])
+        # One diff over the whole balance column; the first row has no previous balance
+        balance = self.data_frame["Account Balance"].astype(float)
+        change = balance.diff().fillna(0).round(2)
+        self.data_frame["Withdrawal Amount"] = change.clip(upper=0).abs()
+        self.data_frame["Deposit Amount"] = change.clip(lower=0)
+
+        if self.spec.include_summaries and summaries:
+            # The statement totals are added to the last transaction when its balance agrees
+            # with the final balance of the account summary
+            summary = summaries[-1]
+            self.data_frame["Total Withdrawal"] = 0.0
+            self.data_frame["Total Deposit"] = 0.0
+            if not self.data_frame.empty and balance.iloc[-1] == summary["Final Balance"]:
+                last_row = self.data_frame.index[-1]
+                self.data_frame.loc[last_row, "Total Withdrawal"] = summary["Total Withdrawal"]
+                self.data_frame.loc[last_row, "Total Deposit"] = summary["Total Deposit"]
+
+        if self.spec.date_formats:
+            self.data_frame = self.process_dates()
+        return self.data_frame
+
+    def format_dates_in_dataframe(self, df):
+        # "05Aug" -> "05 Aug", parsed into dates when the spec has date formats
+        for column in ('Post Date', 'Transaction Date'):
+            if column in df.columns:
+                if self.spec.date_formats:
+                    df[column] = self.parse_date_column(df[column])
+                else:
+                    df[column] = normalise_date_text(df[column])
+        return df
+
+    def extract_transaction_amount(self, array_of_transactions=None):
+        # Credit card statements: every row carries its own amount
+        if array_of_transactions is None:
+            array_of_transactions = self.extract_transactions()
+        total_outstanding_balance = 0
+        for transaction in array_of_transactions:
+            total_outstanding_balance += transaction["Transaction Amount"]
+
+        print(f"Total outstanding balance: {total_outstanding_balance}")
+
+        # Create DataFrame
+        self.data_frame = pd.DataFrame(array_of_transactions)
+        # Format the dates in the DataFrame
+        self.data_frame = self.format_dates_in_dataframe(self.data_frame)
+        return self.data_frame
+
+    def export_to_csv(self):
+        if not os.path.exists(os.path.join("../CSV", self.file_name)):
+            os.makedirs(os.path.join("../CSV", self.file_name))
+        self.data_frame.to_csv(f"../CSV/{self.file_name}/{self.file_name}.csv", index=False)
+        print(f"Exported data to CSV: ../CSV/{self.file_name}/{self.file_name}.csv")
+
+    def process_bank_statement(self, use_ocr=False, regex_patterns=None, save_images=True):
+        # The markers come from the spec unless overridden
+        transactions = list(self.iter_transactions(use_ocr, regex_patterns, save_images))
+
+        if self.spec.layout == "credit_card":
+            return self.extract_transaction_amount(transactions)
+        return self.convert_pdf_to_df(transactions)
@@ -0,0 +1,65 @@
+import json
+import os
+from dataclasses import dataclass, field
+
+# Registry of every supported statement; adding a bank or a statement type is an entry in
+# this file, not new code (override with STATEMENT_SPECS_PATH)
+STATEMENT_SPECS_PATH = os.getenv("STATEMENT_SPECS_PATH",
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), "statement_specs.json"))
+LAYOUTS = ("bank_account", "credit_card")
+
+
+@dataclass(frozen=True)
+class StatementSpec:
+    """
+    Everything the parser engine needs to know about one bank's statement type.
+
+    layout picks how rows are tokenised and turned into a DataFrame ("bank_account" rows
+    carry a running balance, "credit_card" rows a post date and an amount); the markers
+    delimit the transaction section, row_start and fields are the tokenizer patterns,
+    date_formats are the day-month formats of the transaction dates and statement_period
+    the patterns that find the statement period (and so the year) on the document.
+    """
+
+    bank: str
+    statement: str
+    layout: str
+    start_marker: str
+    end_marker: str
+    row_start: str
+    fields: dict = field(default_factory=dict)
+    date_formats: tuple = ()
+    statement_period: tuple = ()
+    include_summaries: bool = False
+    roi: tuple = None
+    render_profile: str = None
+
+    @property
+    def regex_patterns(self):
+        return {"start_marker": self.start_marker, "end_marker": self.end_marker}
+
+
+def load_statement_specs(path=STATEMENT_SPECS_PATH):
+    # Entries inherit row_start, fields, date_formats and statement_period from their layout and
+    # may override any of them
+    with open(path) as file:
+        registry = json.load(file)
+
+    specs = {}
+    for entry in registry["statements"]:
+        layout = entry.get("layout")
+        if layout not in LAYOUTS or layout not in registry["layouts"]:
+            raise ValueError(f"Statement spec {entry.get('bank')}/{entry.get('statement')} has unknown layout '{layout}'")
+        defaults = registry["layouts"][layout]
+        options = {**defaults, **entry}
+        options["fields"] = {**defaults.get("fields", {}), **entry.get("fields", {})}
+        options["date_formats"] = tuple(options.get("date_formats", ()))
+        options["statement_period"] = tuple(options.get("statement_period", ()))
+        if options.get("roi") is not None:
+            options["roi"] = tuple(options["roi"])
+        try:
+            spec = StatementSpec(**options)
+        except TypeError as e:
+            raise ValueError(f"Invalid statement spec {entry.get('bank')}/{entry.get('statement')}: {e}")
+        specs[(spec.bank, spec.statement)] = spec
+    return specs
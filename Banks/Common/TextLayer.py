@@ -0,0 +1,40 @@
+import pypdf
+
+# A page's text layer is only trusted when it has at least this many non-whitespace
+# characters and this share of them are letters or digits
+MIN_TEXT_LAYER_CHARS = 40
+MIN_ALNUM_RATIO = 0.5
+# Share of characters allowed to be glyphs pypdf could not map back to text
+MAX_UNMAPPED_RATIO = 0.02
+
+
+def extract_text_layer(pdf_path):
+    # Returns the embedded text of every page, or None when the PDF cannot be read at all
+    try:
+        with open(pdf_path, 'rb') as file:
+            reader = pypdf.PdfReader(file)
+            page_texts = []
+            for page_obj in reader.pages:
+                try:
+                    page_texts.append(page_obj.extract_text() or "")
+                except Exception as e:
+                    print(f"Warning: could not read the text layer of a page: {e}")
+                    page_texts.append("")
+            return page_texts
+    except Exception as e:
+        print(f"Warning: could not read the text layer of {pdf_path}: {e}")
+        return None
+
+
+def is_usable_text(text):
+    # Quality check used to decide whether a page can skip OCR
+    if not text:
+        return False
+    characters = "".join(text.split())
+    if len(characters) < MIN_TEXT_LAYER_CHARS:
+        return False
+    unmapped = text.count("\ufffd") + text.count("(cid:")
+    if unmapped / len(characters) > MAX_UNMAPPED_RATIO:
+        return False
+    alnum = sum(character.isalnum() for character in characters)
+    return alnum / len(characters) >= MIN_ALNUM_RATIO
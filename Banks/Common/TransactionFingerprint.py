@@ -0,0 +1,58 @@
+import hashlib
+
+import pandas as pd
+
+FINGERPRINT_COLUMN = 'Fingerprint'
+# Where a parsed statement keeps its date, first match wins; credit card statements are
+# keyed on the transaction date, which does not move between statements
+DATE_COLUMNS = ('Transaction Date', 'Post Date', 'Date')
+
+
+def transaction_amounts(df):
+    # Signed amount of every row, money in positive and money out negative: deposits less
+    # withdrawals for account statements, the charged amount negated for credit card ones
+    if 'Transaction Amount' in df.columns:
+        return -df['Transaction Amount'].astype(float)
+    if 'Withdrawal Amount' in df.columns and 'Deposit Amount' in df.columns:
+        return df['Deposit Amount'].astype(float) - df['Withdrawal Amount'].astype(float)
+    return pd.Series(0.0, index=df.index)
+
+
+def fingerprint_amounts(df):
+    # The amount a row is recognised by: the printed running balance for account statements,
+    # since their withdrawals and deposits are derived from the change in balance, which the
+    # first row of every statement does not have; the charged amount for credit card ones
+    if 'Transaction Amount' not in df.columns and 'Account Balance' in df.columns:
+        return df['Account Balance'].astype(float)
+    return transaction_amounts(df)
+
+
+def transaction_dates(df):
+    for column in DATE_COLUMNS:
+        if column in df.columns:
+            return pd.to_datetime(df[column], errors='coerce').dt.strftime('%Y-%m-%d').fillna('')
+    return pd.Series('', index=df.index)
+
+
+def fingerprint_transactions(df, bank, account):
+    """
+    Deterministic fingerprint of every transaction in a parsed statement.
+
+    The fingerprint hashes the bank, account, date, amount (the running balance on account
+    statements, see fingerprint_amounts) and whitespace/case-normalised description, plus
+    the row's ordinal among the rows of the same day with those same values, so two
+    genuinely identical purchases on one day stay two rows while the same transaction read
+    from two overlapping statements gets the same fingerprint both times.
+    """
+    descriptions = (df['Description'].fillna('').astype(str).str.replace(r'\s+', ' ', regex=True)
+                    .str.strip().str.upper()) if 'Description' in df.columns else pd.Series('', index=df.index)
+    keys = pd.DataFrame({
+        'date': transaction_dates(df),
+        'amount': fingerprint_amounts(df).round(2).map('{:.2f}'.format),
+        'description': descriptions,
+    }, index=df.index)
+    keys['ordinal'] = keys.groupby(['date', 'amount', 'description'], sort=False).cumcount().astype(str)
+
+    prefix = f"{bank.upper()}|{account}|"
+    return pd.Series([hashlib.sha256((prefix + '|'.join(row)).encode('utf-8')).hexdigest()
+                      for row in keys.itertuples(index=False, name=None)], index=df.index)
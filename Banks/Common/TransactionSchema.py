@@ -0,0 +1,111 @@
+from sqlalchemy import text
+
+TRANSACTIONS_TABLE = "transactions"
+ROLLUP_TABLE = "monthly_category_totals"
+# Serialises migrations and partition creation between service instances
+SCHEMA_LOCK_ID = 724501
+
+# Month x bank x category totals of the whole transactions table, as rows of ROLLUP_TABLE
+ROLLUP_FROM_TRANSACTIONS = """
+    INSERT INTO monthly_category_totals (month, bank, category, total_amount, income_amount, spend_amount,
+                                         transaction_count, min_amount, max_amount)
+    SELECT date_trunc('month', transaction_date)::date, bank, COALESCE(category, 'Unknown'), SUM(amount),
+           COALESCE(SUM(amount) FILTER (WHERE amount > 0), 0), COALESCE(SUM(amount) FILTER (WHERE amount < 0), 0),
+           COUNT(*), MIN(amount), MAX(amount)
+    FROM transactions
+    GROUP BY 1, 2, 3
+"""
+
+# Applied in order, once each, by migrate(); append new versions, never edit applied ones
+MIGRATIONS = [
+    (1, "Unified transactions table, range-partitioned by month", [
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            fingerprint TEXT NOT NULL,
+            bank TEXT NOT NULL,
+            account TEXT NOT NULL,
+            statement TEXT NOT NULL,
+            transaction_date DATE NOT NULL,
+            post_date DATE,
+            description TEXT NOT NULL,
+            amount NUMERIC(14, 2) NOT NULL,
+            withdrawal_amount NUMERIC(14, 2),
+            deposit_amount NUMERIC(14, 2),
+            balance NUMERIC(14, 2),
+            transaction_type TEXT,
+            reference_number TEXT,
+            merchant TEXT,
+            merchant_group TEXT,
+            payment_method TEXT,
+            location TEXT,
+            category TEXT,
+            ingested_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            UNIQUE (fingerprint, transaction_date)
+        ) PARTITION BY RANGE (transaction_date)
+        """,
+        "CREATE INDEX IF NOT EXISTS transactions_account_date_idx ON transactions (account, transaction_date)",
+        "CREATE INDEX IF NOT EXISTS transactions_category_date_idx ON transactions (category, transaction_date)",
+    ]),
+    (2, "Monthly totals per bank and category, filled from the existing transactions", [
+        """
+        CREATE TABLE IF NOT EXISTS monthly_category_totals (
+            month DATE NOT NULL,
+            bank TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total_amount NUMERIC(16, 2) NOT NULL,
+            income_amount NUMERIC(16, 2) NOT NULL,
+            spend_amount NUMERIC(16, 2) NOT NULL,
+            transaction_count BIGINT NOT NULL,
+            min_amount NUMERIC(14, 2) NOT NULL,
+            max_amount NUMERIC(14, 2) NOT NULL,
+            PRIMARY KEY (month, bank, category)
+        )
+        """,
+        ROLLUP_FROM_TRANSACTIONS,
+    ]),
+]
+
+
+def migrate(connection):
+    # Apply every migration not yet recorded in schema_migrations; returns the versions applied
+    connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": SCHEMA_LOCK_ID})
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+    applied = {row[0] for row in connection.execute(text("SELECT version FROM schema_migrations"))}
+    applied_now = []
+    for version, description, statements in MIGRATIONS:
+        if version in applied:
+            continue
+        for statement in statements:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                           {"version": version, "description": description})
+        print(f"Applied schema migration {version}: {description}")
+        applied_now.append(version)
+    return applied_now
+
+
+def partition_name(month):
+    return f"{TRANSACTIONS_TABLE}_{month:%Y_%m}"
+
+
+def ensure_month_partitions(connection, dates):
+    # Create the monthly partition of every month in dates (a Series of datetimes) that
+    # does not have one yet
+    months = sorted({date.replace(day=1).date() for date in dates.dropna()})
+    # Most uploads land in existing partitions and never take the lock
+    months = [month for month in months if connection.execute(
+        text("SELECT to_regclass(:name)"), {"name": partition_name(month)}).scalar() is None]
+    if not months:
+        return
+    connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": SCHEMA_LOCK_ID})
+    for month in months:
+        next_month = month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TRANSACTIONS_TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"))
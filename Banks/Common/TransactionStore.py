@@ -0,0 +1,69 @@
+import pandas as pd
+
+from Common.MonthlyRollups import ROLLUP_SOURCE_COLUMNS, apply_rollup_deltas, rollup_deltas
+from Common.PostgresLoader import PostgresLoader
+from Common.TransactionFingerprint import (DATE_COLUMNS, FINGERPRINT_COLUMN, fingerprint_transactions,
+                                           transaction_amounts)
+from Common.TransactionSchema import TRANSACTIONS_TABLE, ensure_month_partitions
+
+# Columns of the transactions table filled straight from a column of the analysed statement
+STATEMENT_COLUMNS = {
+    'description': 'Description',
+    'withdrawal_amount': 'Withdrawal Amount',
+    'deposit_amount': 'Deposit Amount',
+    'balance': 'Account Balance',
+    'transaction_type': 'Transaction Type',
+    'reference_number': 'Reference Number',
+    'merchant': 'Merchant',
+    'merchant_group': 'Merchant Group',
+    'payment_method': 'Payment Method',
+    'location': 'Location',
+    'category': 'Category',
+}
+AMOUNT_COLUMNS = ('amount', 'withdrawal_amount', 'deposit_amount', 'balance')
+
+
+def date_column(df):
+    # Name of the column holding the transaction date (see DATE_COLUMNS), None if there is none
+    return next((column for column in DATE_COLUMNS if column in df.columns), None)
+
+
+def transaction_rows(df, bank, account, statement):
+    """
+    The analysed statement df as rows of the transactions table.
+
+    Every bank and statement layout ends up with the same typed columns: the date in
+    transaction_date, a signed amount (money in positive) in amount, and the layout's own
+    columns where it has them (NULL otherwise). Rows without a date or an amount are left
+    out.
+    """
+    dates = pd.to_datetime(df[date_column(df)], errors='coerce').dt.normalize()
+    rows = pd.DataFrame({
+        'fingerprint': df[FINGERPRINT_COLUMN] if FINGERPRINT_COLUMN in df.columns
+        else fingerprint_transactions(df, bank, account),
+        'bank': bank.upper(),
+        'account': account,
+        'statement': statement,
+        'transaction_date': dates,
+        'post_date': (pd.to_datetime(df['Post Date'], errors='coerce').dt.normalize()
+                      if 'Post Date' in df.columns else pd.NaT),
+        'amount': transaction_amounts(df),
+    }, index=df.index)
+    for column, source in STATEMENT_COLUMNS.items():
+        rows[column] = df[source] if source in df.columns else None
+    rows['description'] = rows['description'].fillna('')
+    for column in AMOUNT_COLUMNS:
+        rows[column] = pd.to_numeric(rows[column], errors='coerce').round(2)
+    return rows[rows['transaction_date'].notna() & rows['amount'].notna()]
+
+
+def store_transactions(connection, df, bank, account, statement):
+    # Insert the analysed statement into the transactions table, skipping rows already stored
+    # (same fingerprint), and add the inserted rows to the monthly rollups in the same
+    # transaction; returns (rows, number of rows inserted)
+    rows = transaction_rows(df, bank, account, statement)
+    ensure_month_partitions(connection, rows['transaction_date'])
+    inserted = PostgresLoader(connection).load(rows, TRANSACTIONS_TABLE, conflict_columns=['fingerprint', 'transaction_date'],
+                                               skip_existing=True, create_table=False, returning=ROLLUP_SOURCE_COLUMNS)
+    apply_rollup_deltas(connection, rollup_deltas(inserted))
+    return rows, len(inserted)
@@ -0,0 +1,258 @@
+import re
+from dataclasses import dataclass
+
+# Text following the last amount of a row that does not belong to its description
+TAIL_STOP = re.compile(r'Please note that you are bound|Total')
+
+
+@dataclass(frozen=True)
+class BankTransaction:
+    date: str
+    description: str
+    balance: float
+
+    def to_dict(self):
+        return {"Date": self.date, "Description": self.description, "Account Balance": self.balance}
+
+
+@dataclass(frozen=True)
+class AccountSummary:
+    total_withdrawal: float
+    total_deposit: float
+    final_balance: float
+
+    def to_dict(self):
+        return {
+            "Total Withdrawal": self.total_withdrawal,
+            "Total Deposit": self.total_deposit,
+            "Final Balance": self.final_balance,
+        }
+
+
+@dataclass(frozen=True)
+class CardTransaction:
+    post_date: str
+    transaction_date: str
+    description: str
+    amount: float
+
+    def to_dict(self):
+        return {
+            "Post Date": self.post_date,
+            "Transaction Date": self.transaction_date,
+            "Description": self.description,
+            "Transaction Amount": self.amount,
+        }
+
+
+def description_tail(row, amounts, after):
+    # Continuation text of the description: whatever follows the `after`-th amount (1-based)
+    # up to the next "Total"/"Please note" or the end of the row, on any line
+    if len(amounts) < after:
+        return None
+    tail_start = amounts[after - 1].end()
+    if tail_start >= len(row):
+        return None
+    stop = TAIL_STOP.search(row, tail_start + 1)
+    return row[tail_start:stop.start() if stop else len(row)]
+
+
+def join_description(description, tail):
+    if tail is None:
+        return description
+    tail = tail.strip().replace('\n', ' ')
+    return f"{description} {tail}"
+
+
+class BankStatementTokenizer:
+    """
+    Splits the transaction section of a bank account statement into rows and extracts
+    date, description and running balance from each row in a single pass.
+
+    Every pattern is compiled once, when the tokenizer is created. A row is read with one
+    anchored match for its date and description plus one scan over its amounts; the
+    per-field searches are only used for the rare rows the anchored match does not fit.
+    """
+
+    def __init__(self, row_start=r'\d{2} \w{3} (?=[A-Za-z])', date=r'\d{2} \w{3}', amount=r'\d+\.\d{2}',
+                 account_summary=r'Total\s([\d,]+\.\d{2})\s([\d,]+\.\d{2})\s([\d,]+\.\d{2})'):
+        self.row_start = re.compile(f'(?={row_start})')
+        self.row = re.compile(f'(?P<date>{date}) (?P<description>.+?)(?={amount})')
+        self.date = re.compile(date)
+        self.amount = re.compile(amount)
+        self.description = re.compile(f'(?<={date} )(.+?)(?={amount})')
+        self.account_summary = re.compile(account_summary)
+
+    def clean_row(self, row):
+        return row.strip()
+
+    def split_rows(self, text):
+        starts = [match.start() for match in self.row_start.finditer(text)]
+        bounds = zip([0] + starts, starts + [len(text)])
+        return [row for row in (self.clean_row(text[start:end]) for start, end in bounds) if row]
+
+    def tokenize(self, text, include_summaries=False):
+        return [record for row in self.split_rows(text) for record in self.parse_row(row, include_summaries)]
+
+    def parse_row(self, row, include_summaries=False):
+        # The records of one cleaned row: its transaction, followed by the account summary
+        # when include_summaries is set and the row holds one
+        records = []
+        stripped_row = row.replace(',', '')
+        amounts = list(self.amount.finditer(stripped_row))
+        if not amounts:
+            return records
+        match = self.row.match(stripped_row)
+        if match:
+            date, description = match.group('date'), match.group('description')
+        else:
+            date_match = self.date.search(stripped_row)
+            description_match = self.description.search(stripped_row)
+            if not date_match or not description_match:
+                return records
+            date, description = date_match.group(), description_match.group()
+        description = join_description(description.strip(), description_tail(stripped_row, amounts, 2))
+        records.append(BankTransaction(date=date, description=description, balance=float(amounts[-1].group())))
+
+        if include_summaries:
+            summary = self.account_summary.search(row)
+            if summary:
+                records.append(AccountSummary(*(float(value.replace(',', '')) for value in summary.groups())))
+        return records
+
+
+class CreditCardStatementTokenizer:
+    """
+    Splits the transaction section of a credit card statement into rows and extracts post
+    date, transaction date, description and amount from each row in a single pass.
+
+    Like BankStatementTokenizer, every row pattern is built from the field patterns it is
+    given, so a card with another date layout only needs another spec.
+    """
+
+    def __init__(self, row_start=r'[0O]\d{1}\w{3}\s\d{2}[\s]?\w{3}', post_date=r'\d{2}\w{3}',
+                 transaction_date=r'\d{2}[\s]*\w{3}', amount=r'\d+\.\d{2}'):
+        self.row_start = re.compile(f'(?={row_start})')
+        # OCR reads the leading zero of the post date as the letter O
+        self.ocr_zero = re.compile(r'\bO(\d{1}\w{3})')
+        self.row = re.compile(f'(?P<post_date>{post_date})\\s(?P<transaction_date>{transaction_date})'
+                              f'(?P<description>.+?)(?={amount})')
+        self.post_date = re.compile(post_date)
+        self.transaction_date = re.compile(transaction_date)
+        self.amount = re.compile(amount)
+        self.description = re.compile(f'(?:{post_date}\\s{transaction_date})(?P<description>.+?)(?={amount})')
+
+    def clean_row(self, row):
+        return self.ocr_zero.sub(r'0\1', row.strip())
+
+    def split_rows(self, text):
+        starts = [match.start() for match in self.row_start.finditer(text)]
+        bounds = zip([0] + starts, starts + [len(text)])
+        return [row for row in (self.clean_row(text[start:end]) for start, end in bounds) if row]
+
+    def tokenize(self, text):
+        return [record for row in self.split_rows(text) for record in self.parse_row(row)]
+
+    def parse_row(self, row):
+        stripped_row = row.replace(',', '')
+        amounts = list(self.amount.finditer(stripped_row))
+        if not amounts:
+            return []
+        match = self.row.match(stripped_row)
+        if match:
+            post_date = match.group('post_date')
+            transaction_date = match.group('transaction_date')
+            description = match.group('description')
+        else:
+            description_match = self.description.search(stripped_row)
+            transaction_dates = self.transaction_date.findall(stripped_row)
+            post_date_match = self.post_date.search(stripped_row)
+            if not description_match or not post_date_match or len(transaction_dates) < 2:
+                return []
+            post_date = post_date_match.group()
+            transaction_date = transaction_dates[1]
+            description = description_match.group('description')
+        description = join_description(description.strip(), description_tail(stripped_row, amounts, 1))
+        return [CardTransaction(post_date=post_date, transaction_date=transaction_date,
+                                description=description, amount=float(amounts[0].group()))]
+
+
+def section_marker(marker):
+    # The regex a section marker is searched with, both when pruning pages to the section
+    # (see Common.PageOCR) and when parsing it: OCR garbles punctuation and case, so besides
+    # the marker regex itself its words are accepted in order, separated by any non-word
+    # characters (a line break included)
+    words = r'\W+'.join(re.findall(r'\w+', marker))
+    return re.compile(f'(?:{marker})|(?:{words})' if words else marker, re.IGNORECASE)
+
+
+class StreamingStatementParser:
+    """
+    Parses a statement one page of text at a time, yielding records as soon as they are complete.
+
+    The parser tracks whether it is inside the transaction section (between the start and
+    end markers) and only holds on to the row that may still continue on the next page, so
+    the first transactions are available before the last page is read and memory stays flat
+    however long the statement is. Fed the pages of a statement, it yields the same records
+    as tokenizing the section of the joined text at once.
+    """
+
+    def __init__(self, tokenizer, start_marker, end_marker, **tokenize_options):
+        self.tokenizer = tokenizer
+        self.start_marker = section_marker(start_marker)
+        self.end_marker = section_marker(end_marker)
+        self.tokenize_options = tokenize_options
+        self.inside = False
+        self.finished = False
+        self.pages = 0
+        # Text not parsed yet: the latest page until the start marker is found, then
+        # everything from the start of the last (possibly incomplete) row
+        self.buffer = ""
+
+    def feed(self, text):
+        if self.finished:
+            return
+        self.buffer = f"{self.buffer}\n{text}" if self.pages else text
+        self.pages += 1
+
+        if not self.inside:
+            start = self.start_marker.search(self.buffer)
+            if not start:
+                # Keep this page only, in case the marker is split over the page break
+                self.buffer = text
+                return
+            self.inside = True
+            self.buffer = self.buffer[start.start():]
+
+        end = self.end_marker.search(self.buffer)
+        if end:
+            self.finished = True
+            # The marker itself is not part of the last row
+            section, self.buffer = self.buffer[:end.start()], ""
+            yield from self.parse(section, final=True)
+        else:
+            yield from self.parse(self.buffer, final=False)
+
+    def finish(self):
+        # Flush the last row once every page has been fed
+        if self.finished:
+            return
+        self.finished = True
+        if not self.inside:
+            print("Warning: start marker not found, no transactions parsed")
+            return
+        print("Warning: end marker not found, parsed up to the end of the statement")
+        section, self.buffer = self.buffer, ""
+        yield from self.parse(section, final=True)
+
+    def parse(self, text, final):
+        starts = [match.start() for match in self.tokenizer.row_start.finditer(text)]
+        bounds = list(zip([0] + starts, starts + [len(text)]))
+        if not final:
+            # The last row may still continue on the next page
+            self.buffer = text[bounds[-1][0]:]
+            bounds = bounds[:-1]
+        for start, end in bounds:
+            row = self.tokenizer.clean_row(text[start:end])
+            if row:
+                yield from self.tokenizer.parse_row(row, **self.tokenize_options)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The service imports its modules as Common.*, relative to Banks/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+import random
+
+from Common.AhoCorasick import AhoCorasick
+from Common.MerchantDictionary import MerchantDictionary, MerchantEntry, load_merchant_dictionary
+
+
+def brute_force_find_all(patterns, text):
+    return sorted((start + len(pattern) - 1, index) for index, pattern in enumerate(patterns)
+                  for start in range(len(text) - len(pattern) + 1) if text.startswith(pattern, start))
+
+
+def brute_force_match(entries, text):
+    # Longest pattern, then the one ending first, then the first listed
+    found = [(-len(entry.pattern), start + len(entry.pattern), index) for index, entry in enumerate(entries)
+             for start in range(len(text)) if text.upper().startswith(entry.pattern.upper(), start)]
+    return entries[min(found)[2]] if found else None
+
+
+def test_find_all_reports_every_occurrence():
+    # A small alphabet makes overlapping patterns, patterns inside patterns and repeats common
+    generator = random.Random(16)
+    for _ in range(300):
+        patterns = ["".join(generator.choices("ab c", k=generator.randint(1, 5)))
+                    for _ in range(generator.randint(1, 12))]
+        text = "".join(generator.choices("ab cd", k=generator.randint(0, 60)))
+        assert sorted(AhoCorasick(patterns).find_all(text)) == brute_force_find_all(patterns, text)
+
+
+def test_merchant_dictionary_matches_like_a_substring_search():
+    dictionary = load_merchant_dictionary()
+    patterns = [entry.pattern for entry in dictionary.entries]
+    generator = random.Random(16)
+    for _ in range(2000):
+        parts = generator.sample(patterns, generator.randint(0, 3)) + ["DR-Debit Card", "SG", "1234 5678901"]
+        generator.shuffle(parts)
+        text = " ".join(part.lower() if generator.random() < 0.2 else part for part in parts)
+        assert dictionary.match(text) == brute_force_match(dictionary.entries, text)
+
+
+def test_longest_pattern_wins_whatever_the_order():
+    entries = [MerchantEntry("SHOPEE", "Shopee"), MerchantEntry("SHOPEE PAY", "ShopeePay"),
+               MerchantEntry("PAY", "Pay")]
+    for ordered in (entries, entries[::-1]):
+        assert MerchantDictionary(ordered).match("dr-debit card shopee pay sg").merchant == "ShopeePay"
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from Common.Database import Database
+
+
+def sqlite_database(setup):
+    database = Database(url="sqlite://", setup=setup)
+    database._engine = create_engine("sqlite://")
+    return database
+
+
+def test_setup_runs_once_before_the_first_connection():
+    calls = []
+    database = sqlite_database(lambda connection: calls.append(connection.execute(text("SELECT 1")).scalar()))
+    for _ in range(3):
+        with database.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    assert calls == [1]
+
+
+def test_failed_setup_is_retried_on_the_next_use():
+    attempts = []
+
+    def setup(connection):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OperationalError("SELECT 1", {}, Exception("the database system is starting up"))
+
+    database = sqlite_database(setup)
+    with pytest.raises(OperationalError):
+        with database.begin():
+            pass
+    with database.begin() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+    assert len(attempts) == 2 and database.set_up
@@ -0,0 +1,83 @@
+import random
+import re
+
+import pandas as pd
+
+from Common.CategoryRules import CATEGORY_RULES_PATH, CategoryRuleEngine
+from Common.DescriptionClassifier import DescriptionClassifier
+from Common.FuzzyMerchants import FuzzyMerchantMatcher
+from Common.MerchantDictionary import load_merchant_dictionary
+
+# Parts of the descriptions the per-row classifier knew about, and some it did not
+FRAGMENTS = ["DR-Debit Card", "SG", "SGD", "GPAY", "KOPI STALL", "ACME TRADING", "TRANSFER", "HAWKER 23", "NETS",
+             "Inward"]
+# At most one per description: with both, the per-row classifier took the first and the
+# merchant dictionary takes the longest
+MERCHANTS = ["GPAY SINGAPORE", "SHOPEE SINGAPORE"]
+
+
+def per_row_classification(description):
+    # The classifier every bank's analyser ran on each row before Common.DescriptionClassifier
+    transaction_type = 'Unknown'
+    date = 'Unknown'
+    reference_number = 'Unknown'
+    merchant = 'Unknown'
+    payment_method = 'Unknown'
+    location = 'Unknown'
+
+    date_match = re.search(r'\d{2} \w{3}', description)
+    if date_match:
+        date = date_match.group(0)
+    reference_match = re.search(r'\d{4} \d{7}', description)
+    if reference_match:
+        reference_number = reference_match.group(0)
+    merchant_match = re.search(r'SHOPEE SINGAPORE|GPAY SINGAPORE', description)
+    if merchant_match:
+        merchant = merchant_match.group(0)
+        if 'GPAY' in merchant:
+            payment_method = 'GPAY'
+        if 'SHOPEE' in merchant:
+            merchant = 'Shopee Singapore'
+    if 'GPAY' in description:
+        payment_method = 'GPAY'
+    if 'SG' in description:
+        location = 'Singapore (SG)'
+    if 'DR-Debit Card' in description:
+        transaction_type = 'Debit Card Purchase'
+    else:
+        transaction_type = 'Miscellaneous Expense'
+
+    return {
+        'Transaction Type': transaction_type,
+        'Date': date,
+        'Reference Number': reference_number,
+        'Merchant': merchant,
+        'Payment Method': payment_method,
+        'Location': location
+    }
+
+
+def generated_descriptions(generator, count):
+    descriptions = []
+    for _ in range(count):
+        parts = generator.sample(FRAGMENTS, generator.randint(0, 4))
+        if not parts or generator.random() < 0.5:
+            parts.insert(generator.randint(0, len(parts)), generator.choice(MERCHANTS))
+        if generator.random() < 0.5:
+            parts.insert(generator.randint(0, len(parts)), f"{generator.randint(1, 28):02d} "
+                                                          f"{generator.choice(['Jan', 'Jul', 'Dec'])}")
+        if generator.random() < 0.5:
+            parts.append(f"{generator.randint(1000, 9999)} {generator.randint(10 ** 6, 10 ** 7 - 1)}")
+        descriptions.append(generator.choice(["", " "]) + " ".join(parts))
+    return descriptions
+
+
+def test_column_classifier_matches_the_per_row_classifier():
+    dictionary = load_merchant_dictionary()
+    classifier = DescriptionClassifier(dictionary, CategoryRuleEngine(CATEGORY_RULES_PATH),
+                                       fuzzy_matcher=FuzzyMerchantMatcher(dictionary))
+    descriptions = generated_descriptions(random.Random(15), 5000)
+
+    expected = pd.DataFrame([per_row_classification(description.strip()) for description in descriptions])
+    classified = classifier.classify(pd.Series(descriptions))
+    pd.testing.assert_frame_equal(classified[expected.columns], expected)
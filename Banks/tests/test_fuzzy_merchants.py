@@ -0,0 +1,33 @@
+import pytest
+
+from Common.FuzzyMerchants import FuzzyMerchantMatcher
+from Common.MerchantDictionary import load_merchant_dictionary
+
+MATCHER = FuzzyMerchantMatcher(load_merchant_dictionary())
+
+
+def merchant(description):
+    match = MATCHER.match(description)
+    return match[0].merchant if match else None
+
+
+@pytest.mark.parametrize("description", ["APPLE PAY SINGAPORE", "OPAY SINGAPORE", "DR-Debit Card EBAY SINGAPORE SG"])
+def test_location_words_alone_do_not_match_a_merchant(description):
+    assert merchant(description) is None
+
+
+def test_stop_words_of_a_pattern_must_be_in_the_description():
+    assert merchant("SINGAP0RE AIRL1NES") == "Singapore Airlines"
+    assert merchant("QATAR AIRLINES") is None
+
+
+@pytest.mark.parametrize("description, expected", [
+    ("SH0PEE S1NGAPORE", "Shopee Singapore"),
+    ("DR-Debit Card SH0PE SINGAPORE SG", "Shopee Singapore"),
+    ("NETFLlX.COM", "Netflix"),
+    ("NETFIX.COM", "Netflix"),
+    ("C0LD ST0RAGE", "Cold Storage"),
+    ("NTUC FA1RPRlCE", "NTUC FairPrice"),
+])
+def test_ocr_slips_still_match_their_merchant(description, expected):
+    assert merchant(description) == expected
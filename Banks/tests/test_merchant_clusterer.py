@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from Common.FuzzyMerchants import MerchantClusterer
+
+DESCRIPTIONS = ["AH HOCK FRIED KWAY TEOW <REF>", "AH H0CK FRIED KWAY TEOW SINGAPORE", "TIONG BAHRU BAKERY <AMT>",
+                "TI0NG BAHRU BAKERY SG", "DR-Debit Card AH HOCK FRIED KWAY TEOW SG"]
+
+
+def test_ocr_variants_join_one_cluster():
+    clusterer = MerchantClusterer()
+    labels = [clusterer.assign(description) for description in DESCRIPTIONS]
+    assert labels == ["Ah Hock Fried Kway Teow", "Ah Hock Fried Kway Teow", "Tiong Bahru Bakery",
+                      "Tiong Bahru Bakery", "Ah Hock Fried Kway Teow"]
+    assert clusterer.assign("<REF> SINGAPORE") is None
+
+
+def test_clusters_survive_a_restart(tmp_path):
+    db_path = str(tmp_path / "clusters.sqlite3")
+    first = MerchantClusterer(db_path=db_path)
+    assert first.assign("TI0NG BAHRU BAKERY SG") == "Tiong Bahru Bakery"
+
+    restarted = MerchantClusterer(db_path=db_path)
+    assert restarted.cluster_labels == first.cluster_labels
+    # A variant seen for the first time after the restart still joins the stored cluster
+    assert restarted.assign("TIONG BAHRU BAKERY <AMT>") == "Tiong Bahru Bakery"
+
+
+def test_clusterers_sharing_a_database_agree(tmp_path):
+    db_path = str(tmp_path / "clusters.sqlite3")
+    one, other = MerchantClusterer(db_path=db_path), MerchantClusterer(db_path=db_path)
+    assert one.assign("TIONG BAHRU BAKERY") == "Tiong Bahru Bakery"
+    # The other process never saw the cluster but picks it up before starting its own
+    assert other.assign("TI0NG BAHRU BAKERY") == "Tiong Bahru Bakery"
+    assert len(other.cluster_labels) == 1
+
+
+def test_concurrent_assignments_start_one_cluster_per_merchant():
+    clusterer = MerchantClusterer()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        labels = list(executor.map(clusterer.assign, DESCRIPTIONS * 50))
+    assert set(labels) == {"Ah Hock Fried Kway Teow", "Tiong Bahru Bakery"}
+    assert sorted(clusterer.cluster_labels) == ["Ah Hock Fried Kway Teow", "Tiong Bahru Bakery"]
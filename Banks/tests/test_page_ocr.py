@@ -0,0 +1,75 @@
+import pandas as pd
+
+from Common import PageOCR as page_ocr_module
+from Common.PageOCR import PageOCR
+from Common.StatementEngine import STATEMENT_ENGINE
+
+
+class StubPageOCR(PageOCR):
+    # Serves the OCR "result" of every page of a fake statement, recording what was OCR'd
+
+    def __init__(self, pages, **options):
+        super().__init__(**options)
+        self.pages = pages
+        self.ocr_calls = []
+
+    def ocr_pages(self, pdf_path, poppler_path=None, image_folder=None, pages=None, roi=None):
+        self.ocr_calls.append(list(pages or sorted(self.pages)))
+        for page_number in pages or sorted(self.pages):
+            yield page_number, self.pages[page_number]
+
+
+def uob_processor(monkeypatch, tmp_path, page_ocr, text_layer=None):
+    monkeypatch.setattr(page_ocr_module, "extract_text_layer", lambda pdf_path: text_layer)
+    monkeypatch.setattr(page_ocr_module, "page_count", lambda pdf_path, poppler_path=None: len(page_ocr.pages))
+    return STATEMENT_ENGINE.processor("UOB", "bank", pdf_path="statement.pdf", file_name="statement",
+                                      page_ocr=page_ocr, temp_image_folder=str(tmp_path))
+
+
+def test_page_kept_by_pruning_is_parsed_with_the_same_marker_match(monkeypatch, tmp_path):
+    # OCR read the markers with other case and punctuation; pruning keeps the page, so the
+    # parser must find the section on it too
+    page_ocr = StubPageOCR({
+        1: "Statement Period 01 Jul 2024 to 31 Jul 2024",
+        2: ("ACCOUNT TRANSACTION DETAILS - Transaction Details\n"
+            "01 Jul BALANCE B/F 1,000.00\n"
+            "05 Jul DR-Debit Card SHOPEE 25.50 974.50\n"
+            "END OF TRANSACTION DETAILS."),
+    }, prune_to_section=True)
+    processor = uob_processor(monkeypatch, tmp_path, page_ocr)
+
+    data_frame = processor.process_bank_statement(use_ocr=True, save_images=False)
+
+    assert processor.pages_read == 1
+    assert list(data_frame["Date"]) == [pd.Timestamp("2024-07-01"), pd.Timestamp("2024-07-05")]
+
+
+def test_text_layer_without_the_section_markers_is_ocred(monkeypatch, tmp_path):
+    # The table header is an image in the PDF, so the text layer has the rows but not the
+    # start marker; OCR reads the whole page
+    ocr_text = ("Account Transaction Details = Transaction Details\n"
+                "01 Jul BALANCE B/F 1,000.00\n"
+                "05 Jul DR-Debit Card SHOPEE 25.50 974.50\n"
+                "End of Transaction Details")
+    text_layer = [ocr_text.split("\n", 1)[1]]
+    page_ocr = StubPageOCR({1: ocr_text})
+    processor = uob_processor(monkeypatch, tmp_path, page_ocr, text_layer=text_layer)
+
+    data_frame = processor.process_bank_statement(use_ocr="auto", save_images=False)
+
+    assert page_ocr.ocr_calls == [[1]]
+    assert list(data_frame["Description"]) == ["BALANCE B/F", "DR-Debit Card SHOPEE"]
+
+
+def test_text_layer_with_the_section_markers_skips_ocr(monkeypatch, tmp_path):
+    text = ("Account Transaction Details = Transaction Details\n"
+            "01 Jul BALANCE B/F 1,000.00\n"
+            "05 Jul DR-Debit Card SHOPEE 25.50 974.50\n"
+            "End of Transaction Details")
+    page_ocr = StubPageOCR({1: text})
+    processor = uob_processor(monkeypatch, tmp_path, page_ocr, text_layer=[text])
+
+    data_frame = processor.process_bank_statement(use_ocr="auto", save_images=False)
+
+    assert page_ocr.ocr_calls == []
+    assert len(data_frame) == 2
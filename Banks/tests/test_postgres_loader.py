@@ -0,0 +1,51 @@
+import pandas as pd
+from sqlalchemy.dialects import postgresql
+
+from Common.PostgresLoader import PostgresLoader
+from Common.TransactionStore import transaction_rows
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.copies = []
+
+    def copy_expert(self, statement, buffer):
+        self.copies.append((statement, buffer.read()))
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    # Just enough of a SQLAlchemy connection for PostgresLoader.copy_rows
+    dialect = postgresql.dialect()
+
+    def __init__(self):
+        self.recording_cursor = RecordingCursor()
+        self.connection = self
+
+    def cursor(self):
+        return self.recording_cursor
+
+
+def copied(df):
+    connection = RecordingConnection()
+    PostgresLoader(connection).copy_rows("transactions_staging", df)
+    return connection.recording_cursor.copies
+
+
+def test_copy_keeps_empty_strings_apart_from_missing_values():
+    df = pd.DataFrame({"description": ["", None, "KOPITIAM"], "amount": [1.5, float("nan"), -2.0]})
+    [(statement, data)] = copied(df)
+    assert statement.endswith("FROM STDIN WITH (FORMAT csv, NULL '\\N')")
+    assert data.splitlines() == [",1.5", "\\N,\\N", "KOPITIAM,-2.0"]
+
+
+def test_transactions_without_description_copy_an_empty_description():
+    # description is NOT NULL in the transactions table; with COPY's default NULL (an unquoted
+    # empty field) the empty description would be read as NULL
+    statement = pd.DataFrame({"Date": ["2024-01-03"], "Description": [None], "Withdrawal Amount": [4.5],
+                              "Deposit Amount": [0.0], "Fingerprint": ["f"]})
+    [(copy, data)] = copied(transaction_rows(statement, "UOB", "bank", "bank")[["fingerprint", "description", "amount"]])
+    assert "NULL '\\N'" in copy
+    assert data.splitlines() == ["f,,-4.5"]
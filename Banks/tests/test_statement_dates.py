@@ -0,0 +1,72 @@
+import pandas as pd
+
+from Common import PageOCR as page_ocr_module
+from Common.PageOCR import PageOCR
+from Common.StatementDates import parse_dates
+from Common.StatementEngine import STATEMENT_ENGINE
+
+DATE_FORMATS = ["%d-%b", "%d %b", "%d/%m", "%d-%m", "%d.%m"]
+
+
+def test_parse_dates_rolls_back_dates_after_the_statement_period():
+    # A statement from December to January: December dates belong to the year before
+    period = (pd.Timestamp("2023-12-01"), pd.Timestamp("2024-01-05"))
+    dates = parse_dates(pd.Series(["28 Dec", "31Dec", "03 Jan"]), DATE_FORMATS, period)
+    assert list(dates) == [pd.Timestamp("2023-12-28"), pd.Timestamp("2023-12-31"), pd.Timestamp("2024-01-03")]
+
+
+def test_parse_dates_reads_29_february_in_leap_years_only():
+    assert parse_dates(pd.Series(["29 Feb"]), DATE_FORMATS, (None, pd.Timestamp("2024-03-31")))[0] == \
+        pd.Timestamp("2024-02-29")
+    assert pd.isna(parse_dates(pd.Series(["29 Feb"]), DATE_FORMATS, (None, pd.Timestamp("2023-03-31")))[0])
+
+
+def test_parse_dates_keeps_dates_within_the_grace_period():
+    period = (None, pd.Timestamp("2024-03-31"))
+    dates = parse_dates(pd.Series(["31 Mar", "05 Apr", "15 Apr"]), DATE_FORMATS, period)
+    assert list(dates) == [pd.Timestamp("2024-03-31"), pd.Timestamp("2024-04-05"), pd.Timestamp("2023-04-15")]
+
+
+def test_parse_dates_leaves_missing_values_missing():
+    period = (None, pd.Timestamp("2024-08-31"))
+    for missing in (None, float("nan")):
+        dates = parse_dates(pd.Series(["05Aug", missing, "07 Aug"]), DATE_FORMATS, period)
+        assert dates[0] == pd.Timestamp("2024-08-05") and pd.isna(dates[1]) and dates[2] == pd.Timestamp("2024-08-07")
+
+
+def test_parse_dates_without_period_is_relative_to_today():
+    dates = parse_dates(pd.Series(["20 Dec", "02 Jan"]), DATE_FORMATS, today=pd.Timestamp("2024-01-10"))
+    assert list(dates) == [pd.Timestamp("2023-12-20"), pd.Timestamp("2024-01-02")]
+
+
+class StubPageOCR(PageOCR):
+    # OCR "result" of every page of a fake three page statement; the period is only on page 1
+    PAGES = {
+        1: "UOB One Account\nStatement Period 01 Dec 2023 to 05 Jan 2024",
+        2: "Important notices",
+        3: ("Account Transaction Details = Transaction Details\n"
+            "28 Dec BALANCE B/F 1,000.00\n"
+            "03 Jan DR-Debit Card SHOPEE 25.50 974.50\n"
+            "End of Transaction Details"),
+    }
+
+    def __init__(self):
+        super().__init__(prune_to_section=True)
+
+    def ocr_pages(self, pdf_path, poppler_path=None, image_folder=None, pages=None, roi=None):
+        for page_number in pages or sorted(self.PAGES):
+            yield page_number, self.PAGES[page_number]
+
+
+def test_statement_period_is_read_from_pages_pruned_before_the_section(monkeypatch, tmp_path):
+    monkeypatch.setattr(page_ocr_module, "extract_text_layer", lambda pdf_path: None)
+    monkeypatch.setattr(page_ocr_module, "page_count", lambda pdf_path, poppler_path=None: len(StubPageOCR.PAGES))
+    processor = STATEMENT_ENGINE.processor("UOB", "bank", pdf_path="statement.pdf", file_name="statement",
+                                           page_ocr=StubPageOCR(), temp_image_folder=str(tmp_path))
+
+    data_frame = processor.process_bank_statement(use_ocr=True, save_images=False)
+
+    # Only the section page reaches the parser, the cover page is pruned
+    assert processor.pages_read == 1
+    assert processor.statement_period == (pd.Timestamp("2023-12-01"), pd.Timestamp("2024-01-05"))
+    assert list(data_frame["Date"]) == [pd.Timestamp("2023-12-28"), pd.Timestamp("2024-01-03")]
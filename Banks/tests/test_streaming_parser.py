@@ -0,0 +1,68 @@
+import random
+import re
+
+import pytest
+
+from Common.StatementEngine import STATEMENT_ENGINE
+from Common.TransactionTokenizer import StreamingStatementParser
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+MERCHANTS = ["DR-Debit Card SHOPEE SINGAPORE SG", "SALARY ACME PTE LTD", "KOPITIAM", "NETS PURCHASE COLD STORAGE",
+             "GRAB RIDES", "PAYNOW TRANSFER TO J TAN", "NTUC FAIRPRICE"]
+
+
+def amount(generator):
+    return f"{generator.uniform(0.5, 12000):,.2f}"
+
+
+def bank_row_lines(generator):
+    date = f"{generator.randint(1, 28):02d} {generator.choice(MONTHS)}"
+    lines = [f"{date} {generator.choice(MERCHANTS)} {amount(generator)} {amount(generator)}"]
+    # Some rows continue on the lines below: a reference, a second description line, a summary
+    for _ in range(generator.choice([0, 0, 1, 2])):
+        lines.append(generator.choice([f"REF {generator.randint(1000, 9999)} {generator.randint(10 ** 6, 10 ** 7)}",
+                                       "VALUE DATE", "Total " + " ".join(amount(generator) for _ in range(3))]))
+    return lines
+
+
+def card_row_lines(generator):
+    post = f"{generator.randint(1, 28):02d}{generator.choice(MONTHS).upper()}"
+    transaction = f"{generator.randint(1, 28):02d}{generator.choice(['', ' '])}{generator.choice(MONTHS).upper()}"
+    lines = [f"{post} {transaction} {generator.choice(MERCHANTS)} {amount(generator)}"]
+    if generator.random() < 0.3:
+        lines.append(f"Ref No. : {generator.randint(10 ** 10, 10 ** 11)}")
+    return lines
+
+
+def statement_lines(generator, spec, row_lines):
+    lines = ["Statement header", "Statement Date 05 Jan 2024", spec.start_marker]
+    for _ in range(generator.randint(1, 60)):
+        lines.extend(row_lines(generator))
+    return lines + [spec.end_marker, "Statement footer"]
+
+
+def paginate(generator, lines):
+    # Pages break between lines, anywhere, including right before or after a marker
+    breaks = sorted(generator.sample(range(1, len(lines)), generator.randint(0, min(8, len(lines) - 1))))
+    return ["\n".join(lines[start:end]) for start, end in zip([0] + breaks, breaks + [len(lines)])]
+
+
+@pytest.mark.parametrize("bank, statement", [("UOB", "bank"), ("Citi", "bank"), ("UOB", "credit_card"),
+                                             ("Citi", "credit_card")])
+def test_streaming_matches_tokenizing_the_joined_section(bank, statement):
+    spec, tokenizer = STATEMENT_ENGINE.lookup(bank, statement)
+    options = {"include_summaries": spec.include_summaries} if spec.layout == "bank_account" else {}
+    row_lines = bank_row_lines if spec.layout == "bank_account" else card_row_lines
+    generator = random.Random(f"{bank}-{statement}")
+    for _ in range(200):
+        pages = paginate(generator, statement_lines(generator, spec, row_lines))
+
+        text = "\n".join(pages)
+        section = text[re.search(spec.start_marker, text).start():re.search(spec.end_marker, text).start()]
+        expected = [record.to_dict() for record in tokenizer.tokenize(section, **options)]
+
+        parser = StreamingStatementParser(tokenizer, spec.start_marker, spec.end_marker, **options)
+        streamed = [record.to_dict() for page in pages for record in parser.feed(page)]
+        streamed += [record.to_dict() for record in parser.finish()]
+        assert streamed == expected
+        assert expected
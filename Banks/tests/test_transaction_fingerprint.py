@@ -0,0 +1,65 @@
+import pandas as pd
+
+from Common.StatementEngine import STATEMENT_ENGINE
+from Common.TransactionFingerprint import fingerprint_transactions
+
+# Two UOB statements of one account, 1-31 Jan and 20 Jan - 14 Feb; the second opens with
+# a real transaction rather than a balance brought forward
+JANUARY = """Statement Period 01 Jan 2024 to 31 Jan 2024
+Account Transaction Details = Transaction Details
+01 Jan BALANCE B/F 1,000.00
+05 Jan DR-Debit Card SHOPEE SINGAPORE SG 25.50 974.50
+20 Jan KOPITIAM 3.20 971.30
+20 Jan KOPITIAM 3.20 968.10
+25 Jan SALARY ACME 2,000.00 2,968.10
+End of Transaction Details"""
+OVERLAPPING = """Statement Period 20 Jan 2024 to 14 Feb 2024
+Account Transaction Details = Transaction Details
+20 Jan KOPITIAM 3.20 971.30
+20 Jan KOPITIAM 3.20 968.10
+25 Jan SALARY ACME 2,000.00 2,968.10
+03 Feb KOPITIAM 3.20 2,964.90
+End of Transaction Details"""
+
+
+def statement(text, tmp_path):
+    # The statement as the service analyses it, amounts derived from the running balance
+    processor = STATEMENT_ENGINE.processor("UOB", "bank", pdf_path="statement.pdf", file_name="statement",
+                                           temp_image_folder=str(tmp_path))
+    return processor.convert_pdf_to_df(list(processor.parse_pages([text])))
+
+
+def fingerprints(df, account="bank"):
+    return list(fingerprint_transactions(df, "UOB", account))
+
+
+def test_overlapping_statements_give_shared_transactions_one_fingerprint(tmp_path):
+    january, overlapping = statement(JANUARY, tmp_path), statement(OVERLAPPING, tmp_path)
+    # The first row of a statement has no previous balance, so no withdrawal of its own
+    assert overlapping["Withdrawal Amount"].iloc[0] == 0
+    stored = set(fingerprints(january))
+    assert [fingerprint in stored for fingerprint in fingerprints(overlapping)] == [True, True, True, False]
+
+
+def test_identical_transactions_on_one_day_stay_apart(tmp_path):
+    january = statement(JANUARY, tmp_path)
+    assert len(set(fingerprints(january))) == len(january)
+    # Two rows with the same date, description and balance (e.g. read twice from one page)
+    # still get one fingerprint each
+    twice = pd.concat([january.iloc[[2]], january.iloc[[2]]], ignore_index=True)
+    first, second = fingerprints(twice)
+    assert first != second
+
+
+def test_fingerprint_ignores_case_and_whitespace_but_not_the_account(tmp_path):
+    january = statement(JANUARY, tmp_path)
+    reread = january.assign(Description=" " + january["Description"].str.lower().str.replace(" ", "  ") + " ")
+    assert fingerprints(reread) == fingerprints(january)
+    assert set(fingerprints(january, account="savings")).isdisjoint(fingerprints(january))
+
+
+def test_credit_card_rows_are_fingerprinted_on_their_amount():
+    rows = pd.DataFrame({"Transaction Date": pd.to_datetime(["2024-01-20", "2024-01-20"]),
+                         "Description": ["KOPITIAM", "KOPITIAM"], "Transaction Amount": [3.20, 4.80]})
+    first, second = fingerprints(rows, account="credit_card")
+    assert first != second
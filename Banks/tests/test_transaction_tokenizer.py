@@ -0,0 +1,171 @@
+import random
+import re
+
+from Common.StatementEngine import STATEMENT_ENGINE
+from Common.TransactionTokenizer import StreamingStatementParser
+
+UOB_STATEMENT = (
+    "Statement header\n"
+    "Account Transaction Details = Transaction Details\n"
+    "01 Jul BALANCE B/F 1,000.00\n"
+    "02 Jul SALARY ACME 2,000.00 3,000.00\n"
+    "05 Jul DR-Debit Card SHOPEE 25.50 2,974.50\n"
+    "End of Transaction Details\n"
+    "Statement footer"
+)
+
+
+def uob_parser():
+    spec, tokenizer = STATEMENT_ENGINE.lookup("UOB", "bank")
+    return StreamingStatementParser(tokenizer, spec.start_marker, spec.end_marker)
+
+
+def parse(parser, pages):
+    records = [record for page in pages for record in parser.feed(page)]
+    return [record.to_dict() for record in records + list(parser.finish())]
+
+
+def test_last_row_stops_at_end_marker():
+    records = parse(uob_parser(), [UOB_STATEMENT])
+    assert [record["Description"] for record in records] == ["BALANCE B/F", "SALARY ACME", "DR-Debit Card SHOPEE"]
+    assert records[-1]["Account Balance"] == 2974.50
+
+
+def test_last_row_stops_at_end_marker_on_next_page():
+    first_page, second_page = UOB_STATEMENT.split("End of Transaction Details")
+    records = parse(uob_parser(), [first_page, "End of Transaction Details" + second_page])
+    assert records[-1]["Description"] == "DR-Debit Card SHOPEE"
+
+
+# The per-field extraction every statement script ran on each row before the tokenizer
+def per_field_bank_records(section):
+    transactions = re.split(r'(?=\d{2} \w{3} (?=[A-Za-z]))', section)
+    transactions = [transaction.strip() for transaction in transactions if transaction.strip()]
+    date_pattern = r'\d{2} \w{3}'
+    amount_pattern = r'\d+\.\d{2}'
+    description_pattern = r'(?<=\d{2} \w{3} )(.+?)(?=\d+\.\d{2})'
+    second_description_pattern = r'(?:.*?\d+\.\d{2}){2}(.+?)(?=Please note that you are bound|Total|$)'
+    account_summary_pattern = r'Total\s([\d,]+\.\d{2})\s([\d,]+\.\d{2})\s([\d,]+\.\d{2})'
+    extracted_data = []
+    for transaction in transactions:
+        if not re.search(date_pattern, transaction) or not re.search(amount_pattern, transaction) or \
+                not re.search(description_pattern, transaction):
+            continue
+        stripped_transaction = transaction.replace(',', '')
+        date = re.search(date_pattern, stripped_transaction).group()
+        balance = re.findall(amount_pattern, stripped_transaction)[-1]
+        description = re.search(description_pattern, stripped_transaction).group().strip()
+        match = re.search(second_description_pattern, stripped_transaction, re.DOTALL)
+        if match:
+            description_after_second = re.sub(r'\n', ' ', match.group(1).strip())
+            description = f"{description} {description_after_second}"
+        extracted_data.append({"Date": date, "Description": description, "Account Balance": float(balance)})
+        match = re.search(account_summary_pattern, transaction)
+        if match:
+            extracted_data.append({"Total Withdrawal": float(match.group(1).replace(',', '')),
+                                   "Total Deposit": float(match.group(2).replace(',', '')),
+                                   "Final Balance": float(match.group(3).replace(',', ''))})
+    return extracted_data
+
+
+def per_field_card_records(section):
+    transactions = re.split(r'(?=[0O]\d{1}\w{3}\s\d{2}[\s]?\w{3})', section)
+    transactions = [re.sub(r'\bO(\d{1}\w{3})', r'0\1', transaction.strip())
+                    for transaction in transactions if transaction.strip()]
+    post_date_pattern = r'\d{2}\w{3}'
+    transaction_date_pattern = r'\d{2}[\s]*\w{3}'
+    amount_pattern = r'\d+\.\d{2}'
+    description_pattern = r'(?:\d{2}\w{3}\s\d{2}[\s]?\w{3})(.+?)(?=\d+\.\d{2})'
+    second_description_pattern = r'(?:.*?\d+\.\d{2})(.+?)(?=Please note that you are bound|Total|$)'
+    extracted_data = []
+    for transaction in transactions:
+        if not re.search(post_date_pattern, transaction) or not re.search(transaction_date_pattern, transaction) or \
+                not re.search(amount_pattern, transaction) or not re.search(description_pattern, transaction):
+            continue
+        stripped_transaction = transaction.replace(',', '')
+        post_date = re.findall(post_date_pattern, stripped_transaction)[0]
+        transaction_date = re.findall(transaction_date_pattern, stripped_transaction)[1]
+        amount = re.findall(amount_pattern, stripped_transaction)[0]
+        description = re.search(description_pattern, stripped_transaction).group(1).strip()
+        match = re.search(second_description_pattern, stripped_transaction, re.DOTALL)
+        if match:
+            description_after_second = re.sub(r'\n', ' ', match.group(1).strip())
+            description = f"{description} {description_after_second}"
+        extracted_data.append({"Post Date": post_date, "Transaction Date": transaction_date,
+                               "Description": description, "Transaction Amount": float(amount)})
+    return extracted_data
+
+
+MONTHS = ["Jan", "Jul", "Aug", "Dec"]
+WORDS = ["DR-Debit Card", "SHOPEE", "SINGAPORE SG", "KOPITIAM", "GIRO", "SALARY ACME", "Inward CR", "REF 1234 1234567",
+         "PAYNOW-FAST", "NETS"]
+
+
+def amount(generator):
+    return f"{generator.uniform(0.1, 25000):,.2f}"
+
+
+def bank_section(generator):
+    # Rows with continuation lines, account summaries and notices; the section header can
+    # itself hold a date and an amount, which only the per-field fallback reads
+    lines = [generator.choice(["Account Transaction Details", f"Balance as at 01 {generator.choice(MONTHS)} 2024 "
+                                                              f"{amount(generator)}"])]
+    for _ in range(generator.randint(1, 25)):
+        day = f"{generator.randint(1, 28):02d} {generator.choice(MONTHS)}"
+        description = " ".join(generator.sample(WORDS, generator.randint(1, 3)))
+        amounts = " ".join(amount(generator) for _ in range(generator.choice([1, 2, 2, 3])))
+        lines.append(f"{day} {description} {amounts}")
+        for _ in range(generator.choice([0, 0, 1, 2])):
+            lines.append(generator.choice([" ".join(generator.sample(WORDS, 2)), "Total " + " ".join(
+                amount(generator) for _ in range(3)), "Please note that you are bound by the terms", ""]))
+    return "\n".join(lines)
+
+
+def card_section(generator):
+    lines = [generator.choice(["LADY'S CARD", f"PREVIOUS BALANCE {amount(generator)}"])]
+    for _ in range(generator.randint(1, 25)):
+        post = f"{generator.choice(['0', 'O'])}{generator.randint(1, 9)}{generator.choice(MONTHS).upper()}"
+        transaction = f"{generator.randint(1, 28):02d}{generator.choice(['', ' '])}{generator.choice(MONTHS).upper()}"
+        description = " ".join(generator.sample(WORDS, generator.randint(1, 3)))
+        lines.append(f"{post} {transaction} {description} {amount(generator)}{generator.choice(['', ' CR'])}")
+        for _ in range(generator.choice([0, 0, 1])):
+            lines.append(generator.choice([f"Ref No. : {generator.randint(10 ** 10, 10 ** 11)}", "SUB-TOTAL 12.00",
+                                           "Please note that you are bound by the terms"]))
+    return "\n".join(lines)
+
+
+def test_bank_tokenizer_matches_the_per_field_extraction():
+    _, tokenizer = STATEMENT_ENGINE.lookup("Citi", "bank")
+    generator = random.Random(10)
+    for _ in range(500):
+        section = bank_section(generator)
+        records = [record.to_dict() for record in tokenizer.tokenize(section, include_summaries=True)]
+        assert records == per_field_bank_records(section)
+
+
+def test_card_tokenizer_matches_the_per_field_extraction():
+    _, tokenizer = STATEMENT_ENGINE.lookup("UOB", "credit_card")
+    generator = random.Random(10)
+    for _ in range(500):
+        section = card_section(generator)
+        assert [record.to_dict() for record in tokenizer.tokenize(section)] == per_field_card_records(section)
+
+
+def test_bank_row_fields():
+    _, tokenizer = STATEMENT_ENGINE.lookup("Citi", "bank")
+    records = tokenizer.parse_row("05 Jul DR-Debit Card SHOPEE 1,025.50 2,974.50\nSINGAPORE SG\n"
+                                  "Total 1,025.50 0.00 2,974.50", include_summaries=True)
+    assert [record.to_dict() for record in records] == [
+        {"Date": "05 Jul", "Description": "DR-Debit Card SHOPEE SINGAPORE SG", "Account Balance": 2974.50},
+        {"Total Withdrawal": 1025.50, "Total Deposit": 0.0, "Final Balance": 2974.50},
+    ]
+    # Read with the per-field fallback: the row does not start with its date
+    [fallback] = tokenizer.parse_row("Balance as at 01 Jul 2024 1,000.00")
+    assert fallback.to_dict() == {"Date": "01 Jul", "Description": "2024", "Account Balance": 1000.00}
+
+
+def test_card_row_fields():
+    _, tokenizer = STATEMENT_ENGINE.lookup("UOB", "credit_card")
+    [record] = tokenizer.parse_row(tokenizer.clean_row("O5JUL 03 JUL GRAB RIDES 12.80\nRef No. : 12345678901"))
+    assert record.to_dict() == {"Post Date": "05JUL", "Transaction Date": "03 JUL",
+                                "Description": "GRAB RIDES Ref No. : 12345678901", "Transaction Amount": 12.80}